@@ -18,12 +18,35 @@ MODEL_CONFIG_KEYS = [
     "embedding_model_name",
 ]
 GENERATION_CONFIG_KEYS = ["temperature", "max_output_tokens", "top_p", "top_k"]
-RAG_KEYS = ["vectordb_path"]
+RAG_KEYS = [
+    "vectordb_path",
+    "shard_key",
+    "num_shards",
+    "snapshot_path",
+    "embedding_batch_size",
+    "embedding_batch_wait_ms",
+    "ingest_watch_dir",
+    "ingest_poll_seconds",
+    "ingest_debounce_seconds",
+    "ingest_batch_size",
+    "ingest_max_attempts",
+    "ingest_publish_snapshot",
+]
+SCHEDULER_KEYS = [
+    "initial_concurrency",
+    "max_concurrency",
+    "rate_limit_per_sec",
+    "burst",
+    "max_attempts",
+    "deadline_seconds",
+    "hedge_after_seconds",
+]
 
 DEFAULT_CONFIG = {
     "model": {},
     "generation": {},
     "rag": {},
+    "scheduler": {},
 }
 
 
@@ -39,6 +62,7 @@ def get_llm_config() -> dict:
         "model": {key: config.get(key, None) for key in MODEL_CONFIG_KEYS},
         "generation": {key: config.get(key, None) for key in GENERATION_CONFIG_KEYS},
         "rag": {key: config.get(key, None) for key in RAG_KEYS},
+        "scheduler": {key: config.get(key, None) for key in SCHEDULER_KEYS},
     }
 
 
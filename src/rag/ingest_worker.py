@@ -0,0 +1,425 @@
+"""Background ingestion service that watches a directory and ingests changes incrementally."""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+from langchain_chroma import Chroma
+
+from src.rag.save_vector import load_pdf_documents, split_documents
+from src.rag.sharded_store import ShardedVectorStore, chunk_ids, get_shard_router
+from src.rag.snapshot import _write_atomic, build_snapshot, latest_snapshot
+from src.utils.logger import get_logger
+from src.utils.rag_utils import (
+    INGEST_STATE_FILE,
+    create_embeddings,
+    rag_config,
+    vector_store_write_lock,
+    vectordb_path,
+)
+
+logger = get_logger(__name__, background=True)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+
+def _signature(path: str) -> Optional[Tuple[float, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+def load_file_documents(
+    path: str, extra_metadata: Optional[dict] = None
+) -> Optional[List[Document]]:
+    """Load a PDF or plain-text file as Documents."""
+    if path.lower().endswith(".pdf"):
+        return load_pdf_documents(path, extra_metadata=extra_metadata)
+
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        text = file.read()
+    if not text.strip():
+        return []
+    return [
+        Document(page_content=text, metadata={"source": path, **(extra_metadata or {})})
+    ]
+
+
+class IngestionService:
+    """
+    Ingests new and modified files from watch_dir, plus anything passed to
+    enqueue / enqueue_documents, on a background thread.
+    A file is ingested once it has been unchanged for `debounce` seconds; up
+    to batch_size files are split and written per store call. Chunks are
+    upserted under deterministic ids and any left over from a previous
+    version of a file are removed in the same locked step, so a restart or a
+    failed write never duplicates or drops a file's chunks. If a batch fails,
+    its files and document batches are retried one by one; one that still
+    fails after max_attempts is quarantined instead of blocking the queue.
+    The signature of every ingested file is kept in chroma_dir, so after a
+    restart only files that changed since are ingested again.
+    """
+
+    def __init__(
+        self,
+        watch_dir: Optional[str] = None,
+        chroma_dir: str = vectordb_path,
+        poll_interval: float = 2.0,
+        debounce: float = 1.0,
+        batch_size: int = 16,
+        extra_metadata: Optional[dict] = None,
+        publish_snapshot: bool = False,
+        max_attempts: int = 3,
+    ):
+        self.watch_dir = watch_dir
+        self.chroma_dir = chroma_dir
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.batch_size = max(1, batch_size)
+        self.extra_metadata = extra_metadata or {}
+        self.publish_snapshot = publish_snapshot
+        self.max_attempts = max(1, max_attempts)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._store = None
+
+        # path -> (enqueued_at, last_change_at, signature)
+        self._pending_files: Dict[str, Tuple[float, float, Optional[tuple]]] = {}
+        # (enqueued_at, documents, failed_attempts)
+        self._pending_docs: List[Tuple[float, List[Document], int]] = []
+        self._state_path = os.path.join(chroma_dir, INGEST_STATE_FILE)
+        self._ingested: Dict[str, Tuple[float, int]] = self._load_state()
+        self._file_attempts: Dict[str, int] = {}
+        # path -> signature of files given up on; a new version is retried
+        self._quarantined_files: Dict[str, Optional[tuple]] = {}
+        self.quarantined_documents: List[Tuple[List[Document], str]] = []
+        self._ingested_files = 0
+        self._ingested_chunks = 0
+        self._last_ingest_lag: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    def _load_state(self) -> Dict[str, Tuple[float, int]]:
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as file:
+                return {path: tuple(sig) for path, sig in json.load(file).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable ingestion state: {str(e)}")
+            return {}
+
+    def _save_state(self) -> None:
+        with self._lock:
+            state = dict(self._ingested)
+        try:
+            os.makedirs(self.chroma_dir, exist_ok=True)
+            _write_atomic(self._state_path, json.dumps(state))
+        except OSError as e:
+            logger.error(f"Error saving ingestion state: {str(e)}")
+
+    def enqueue(self, path: str) -> None:
+        """Queue a file for ingestion."""
+        now = time.monotonic()
+        with self._lock:
+            enqueued_at = self._pending_files.get(path, (now,))[0]
+            self._pending_files[path] = (enqueued_at, now, _signature(path))
+        self._wake.set()
+
+    def enqueue_documents(self, documents: List[Document]) -> None:
+        """Queue already-loaded documents for ingestion."""
+        with self._lock:
+            self._pending_docs.append((time.monotonic(), documents, 0))
+        self._wake.set()
+
+    def scan(self) -> int:
+        """Queue files in watch_dir that are new or changed. Returns the count."""
+        if not self.watch_dir or not os.path.isdir(self.watch_dir):
+            return 0
+
+        now = time.monotonic()
+        queued = 0
+        for dirpath, _, filenames in os.walk(self.watch_dir):
+            for filename in filenames:
+                if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                signature = _signature(path)
+                with self._lock:
+                    if signature is None or signature in (
+                        self._ingested.get(path),
+                        self._quarantined_files.get(path),
+                    ):
+                        continue
+                    pending = self._pending_files.get(path)
+                    if pending is None:
+                        self._pending_files[path] = (now, now, signature)
+                        queued += 1
+                    elif pending[2] != signature:
+                        self._pending_files[path] = (pending[0], now, signature)
+        return queued
+
+    def _take_ready(
+        self,
+    ) -> Tuple[List[Tuple[str, float]], List[Tuple[float, List[Document], int]]]:
+        now = time.monotonic()
+        with self._lock:
+            ready = sorted(
+                (
+                    (path, enqueued_at)
+                    for path, (
+                        enqueued_at,
+                        changed_at,
+                        _,
+                    ) in self._pending_files.items()
+                    if now - changed_at >= self.debounce
+                ),
+                key=lambda item: item[1],
+            )[: self.batch_size]
+            for path, _ in ready:
+                del self._pending_files[path]
+            docs, self._pending_docs = self._pending_docs, []
+        return ready, docs
+
+    def _get_store(self):
+        if self._store is None:
+            router = get_shard_router()
+            if router.enabled:
+                self._store = ShardedVectorStore(
+                    self.chroma_dir, create_embeddings(), router
+                )
+            else:
+                self._store = Chroma(
+                    persist_directory=self.chroma_dir,
+                    embedding_function=create_embeddings(),
+                )
+        return self._store
+
+    def _write(self, store, chunks: List[Document], sources: List[str]) -> None:
+        """Upsert chunks, then delete chunks of `sources` that were not rewritten."""
+        if isinstance(store, ShardedVectorStore):
+            shards = [store._shard(name) for name in store.shard_names()]
+        else:
+            shards = [store]
+
+        ids = chunk_ids(chunks)
+        with vector_store_write_lock(self.chroma_dir):
+            existing = [
+                (shard, shard.get(where={"source": source}).get("ids", []))
+                for source in sources
+                for shard in shards
+            ]
+            if chunks:
+                store.add_documents(chunks, ids=ids)
+            keep = set(ids)
+            for shard, old_ids in existing:
+                stale = [doc_id for doc_id in old_ids if doc_id not in keep]
+                if stale:
+                    shard.delete(ids=stale)
+
+    def _write_items(self, store, items: List[tuple]) -> Tuple[list, list]:
+        """
+        Write all items in one call; if that fails, write them one at a time
+        so a single bad file or document batch cannot fail the others.
+        Returns (written, [(item, error), ...]).
+        """
+        try:
+            self._write(
+                store,
+                [chunk for item in items for chunk in item[5]],
+                [item[0] for item in items if item[0]],
+            )
+            return items, []
+        except Exception as e:
+            if len(items) == 1:
+                return [], [(items[0], e)]
+            logger.warning(f"Batch write failed ({str(e)}); retrying items singly")
+
+        written, failed = [], []
+        for item in items:
+            try:
+                self._write(store, item[5], [item[0]] if item[0] else [])
+                written.append(item)
+            except Exception as e:
+                failed.append((item, e))
+        return written, failed
+
+    def _handle_failures(self, failed: list) -> None:
+        """Requeue failed items, quarantining those out of attempts."""
+        now = time.monotonic()
+        with self._lock:
+            for (path, signature, enqueued_at, attempts, docs, _), error in failed:
+                attempts += 1
+                name = path or f"document batch of {len(docs)}"
+                self._last_error = str(error)
+                if attempts >= self.max_attempts:
+                    logger.error(
+                        f"Quarantined {name} after {attempts} attempt(s): {str(error)}"
+                    )
+                    if path:
+                        self._file_attempts.pop(path, None)
+                        self._quarantined_files[path] = signature
+                    else:
+                        self.quarantined_documents.append((docs, str(error)))
+                    continue
+
+                logger.error(f"Error ingesting {name}: {str(error)}")
+                if path:
+                    self._file_attempts[path] = attempts
+                    self._pending_files.setdefault(path, (enqueued_at, now, signature))
+                else:
+                    self._pending_docs.insert(0, (enqueued_at, docs, attempts))
+
+    def run_once(self) -> int:
+        """Ingest everything that is ready. Returns the number of chunks written."""
+        ready, pending_docs = self._take_ready()
+        if not ready and not pending_docs:
+            return 0
+
+        # One item per file or document batch:
+        # (path or None, signature, enqueued_at, failed_attempts, documents, chunks)
+        items = []
+        for path, enqueued_at in ready:
+            signature = _signature(path)
+            if signature is None:
+                continue
+            try:
+                docs = load_file_documents(path, self.extra_metadata) or []
+            except Exception as e:
+                self._last_error = f"{path}: {e}"
+                logger.error(f"Error loading {path}: {str(e)}")
+                continue
+            attempts = self._file_attempts.get(path, 0)
+            items.append((path, signature, enqueued_at, attempts, docs))
+        for enqueued_at, docs, attempts in pending_docs:
+            items.append((None, None, enqueued_at, attempts, docs))
+        if not items:
+            return 0
+
+        items = [(*item, split_documents(item[4]) if item[4] else []) for item in items]
+        written, failed = self._write_items(self._get_store(), items)
+        if failed:
+            self._handle_failures(failed)
+
+        chunks = sum(len(item[5]) for item in written)
+        files = [(item[0], item[1]) for item in written if item[0]]
+        with self._lock:
+            for path, signature in files:
+                self._ingested[path] = signature
+                self._file_attempts.pop(path, None)
+                self._quarantined_files.pop(path, None)
+            self._ingested_files += len(files)
+            self._ingested_chunks += chunks
+            if written:
+                self._last_ingest_lag = time.monotonic() - min(
+                    item[2] for item in written
+                )
+        if not written:
+            return 0
+        if files:
+            self._save_state()
+        logger.info(
+            f"Ingested {chunks} chunks from {len(files)} file(s) "
+            f"and {len(written) - len(files)} document batch(es)"
+        )
+
+        if self.publish_snapshot:
+            build_snapshot(self.chroma_dir)
+        return chunks
+
+    def stats(self) -> dict:
+        """Queue depth, lag and totals for monitoring."""
+        now = time.monotonic()
+        with self._lock:
+            enqueued = [item[0] for item in self._pending_files.values()]
+            enqueued += [item[0] for item in self._pending_docs]
+            return {
+                "queue_depth": len(self._pending_files) + len(self._pending_docs),
+                "oldest_pending_seconds": now - min(enqueued) if enqueued else 0.0,
+                "last_ingest_lag_seconds": self._last_ingest_lag,
+                "ingested_files": self._ingested_files,
+                "ingested_chunks": self._ingested_chunks,
+                "quarantined": len(self._quarantined_files)
+                + len(self.quarantined_documents),
+                "last_error": self._last_error,
+            }
+
+    def start(self) -> None:
+        """Start the background ingestion thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ingestion", daemon=True)
+        self._thread.start()
+        logger.info(f"Ingestion service started (watching: {self.watch_dir})")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        logger.info("Ingestion service stopped")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.scan()
+                self.run_once()
+            except Exception as e:
+                self._last_error = str(e)
+                logger.error(f"Ingestion loop error: {str(e)}")
+            with self._lock:
+                has_pending = bool(self._pending_files or self._pending_docs)
+            timeout = (
+                min(self.poll_interval, self.debounce)
+                if has_pending
+                else self.poll_interval
+            )
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+
+def publish_snapshot_enabled() -> bool:
+    """
+    Whether ingestion publishes snapshots. Serving prefers the latest
+    snapshot over the live store, so unless configured otherwise this is on
+    whenever snapshot_path is set.
+    """
+    enabled = rag_config.get("ingest_publish_snapshot")
+    if enabled is None:
+        enabled = bool(rag_config.get("snapshot_path"))
+    if not enabled and latest_snapshot():
+        logger.warning(
+            "Snapshot publishing is off but a snapshot exists; retrieval will "
+            "not see ingested documents until the next `make snapshot`"
+        )
+    return bool(enabled)
+
+
+def main():
+    service = IngestionService(
+        watch_dir=rag_config.get("ingest_watch_dir") or "data",
+        poll_interval=rag_config.get("ingest_poll_seconds") or 2.0,
+        debounce=rag_config.get("ingest_debounce_seconds") or 1.0,
+        batch_size=rag_config.get("ingest_batch_size") or 16,
+        max_attempts=rag_config.get("ingest_max_attempts") or 3,
+        publish_snapshot=publish_snapshot_enabled(),
+    )
+    service.start()
+    try:
+        while True:
+            time.sleep(30)
+            logger.info(f"Ingestion stats: {service.stats()}")
+    except KeyboardInterrupt:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""Load-test driver for the RAG pipeline using a stub LLM."""
+
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from src.rag.retrieve_vector import (
+    load_serving_vector_store,
+    query_rag,
+    setup_rag_chain,
+)
+from src.utils.logger import get_logger
+from src.utils.model import ScheduledChatModel
+from src.utils.stub_model import StubChatModel
+
+logger = get_logger(__name__)
+
+SYNTHETIC_QUERIES = [
+    "Give me details about the candidate Bhaskar.",
+    "What programming languages does the candidate know?",
+    "Summarise the candidate's work experience.",
+    "Which machine learning projects has the candidate worked on?",
+    "What is the candidate's educational background?",
+    "Which cloud platforms has the candidate used?",
+    "List the candidate's most recent roles.",
+    "Does the candidate have experience with retrieval-augmented generation?",
+]
+
+
+def load_queries(path: Optional[str] = None) -> List[str]:
+    """
+    Read queries to replay. Each line is either plain text or a JSON object
+    with a "query" field; blank lines are skipped. Without a path the built-in
+    synthetic queries are used.
+    """
+    if not path:
+        return list(SYNTHETIC_QUERIES)
+
+    queries = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    line = json.loads(line).get("query") or ""
+                except json.JSONDecodeError:
+                    pass
+            if line:
+                queries.append(line)
+    return queries
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (pct in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ResourceSampler:
+    """Samples process CPU utilisation and RSS on a background thread."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.samples: List[dict] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="resource-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        start = last_wall = time.monotonic()
+        last_cpu = sum(os.times()[:2])
+        while not self._stop.wait(self.interval):
+            wall, cpu = time.monotonic(), sum(os.times()[:2])
+            self.samples.append(
+                {
+                    "t": round(wall - start, 3),
+                    "cpu_percent": round(
+                        100 * (cpu - last_cpu) / (wall - last_wall), 1
+                    ),
+                    "rss_mb": round(_rss_mb(), 1),
+                }
+            )
+            last_wall, last_cpu = wall, cpu
+
+
+class LoadStats:
+    """Thread-safe record of request outcomes and pipeline executions."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.executions = 0
+        self._lock = threading.Lock()
+
+    def record_execution(self) -> None:
+        with self._lock:
+            self.executions += 1
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.latencies.append(latency)
+            else:
+                self.errors += 1
+
+    def snapshot(self) -> tuple:
+        with self._lock:
+            return list(self.latencies), self.errors, self.executions
+
+
+class _CountingInvoker:
+    """Forwards invoke() to a chain or retriever, counting each execution."""
+
+    def __init__(self, target, stats: LoadStats):
+        self.target = target
+        self.stats = stats
+
+    def invoke(self, *args, **kwargs):
+        self.stats.record_execution()
+        return self.target.invoke(*args, **kwargs)
+
+
+def _to_ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def summarize(
+    stats: LoadStats, duration: float, samples: Optional[List[dict]] = None
+) -> dict:
+    """Build the final report."""
+    latencies, errors, executions = stats.snapshot()
+    total = len(latencies) + errors
+    samples = samples or []
+    return {
+        "requests": total,
+        "pipeline_executions": executions,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "duration_seconds": round(duration, 3),
+        "achieved_qps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            name: _to_ms(percentile(latencies, pct))
+            for name, pct in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))
+        },
+        "max_cpu_percent": max((s["cpu_percent"] for s in samples), default=None),
+        "max_rss_mb": max((s["rss_mb"] for s in samples), default=None),
+        "resources": samples,
+    }
+
+
+def run_load_test(
+    query_fn: Callable[[str], object],
+    queries: List[str],
+    duration: float = 30.0,
+    rate: Optional[float] = None,
+    concurrency: int = 8,
+    max_workers: int = 256,
+    sample_interval: float = 1.0,
+    stats: Optional[LoadStats] = None,
+) -> dict:
+    """
+    Replay queries against query_fn for `duration` seconds.
+    With `rate` set, requests are issued open-loop at that many per second and
+    latency is measured from each request's scheduled start, so queueing delay
+    is included. Otherwise `concurrency` workers issue requests back to back.
+    A None result or an exception counts as an error. Pass the LoadStats that
+    query_fn records executions on to have them included in the report.
+    """
+    stats = stats or LoadStats()
+    sampler = ResourceSampler(sample_interval)
+
+    def issue(query: str, scheduled: float) -> None:
+        try:
+            ok = query_fn(query) is not None
+        except Exception as e:
+            logger.debug(f"Load-test request failed: {e}")
+            ok = False
+        stats.record(time.monotonic() - scheduled, ok)
+
+    sampler.start()
+    start = time.monotonic()
+    end = start + duration
+
+    if rate:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            sent = 0
+            while True:
+                scheduled = start + sent / rate
+                if scheduled >= end:
+                    break
+                delay = scheduled - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(issue, random.choice(queries), scheduled)
+                sent += 1
+    else:
+
+        def worker() -> None:
+            while time.monotonic() < end:
+                issue(random.choice(queries), time.monotonic())
+
+        threads = [
+            threading.Thread(target=worker, name=f"load-{i}")
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    elapsed = time.monotonic() - start
+    sampler.stop()
+    return summarize(stats, elapsed, sampler.samples)
+
+
+def build_query_fn(
+    args: argparse.Namespace, stats: LoadStats
+) -> Optional[Callable[[str], object]]:
+    """
+    RAG pipeline over the serving store, with the stub LLM in place of Vertex.
+    By default the chain is invoked directly, so every request runs the full
+    pipeline; with --coalesce it goes through query_rag's single-flight and
+    the LLM scheduler as served queries do.
+    """
+    vectorstore = load_serving_vector_store()
+    if not vectorstore:
+        logger.error("Failed to load vector store")
+        return None
+
+    search_kwargs = {"k": args.top_k}
+    if args.filter_type:
+        search_kwargs["filter"] = {"type": args.filter_type}
+
+    if args.retrieval_only:
+        retriever = _CountingInvoker(
+            vectorstore.as_retriever(search_kwargs=search_kwargs), stats
+        )
+        return retriever.invoke
+
+    llm = StubChatModel(
+        latency=args.stub_latency,
+        latency_jitter=args.stub_jitter,
+        error_rate=args.stub_error_rate,
+        slow_rate=args.stub_slow_rate,
+        slow_latency=args.stub_slow_latency,
+    )
+    if args.coalesce:
+        llm = ScheduledChatModel(model=llm)
+    rag_chain = setup_rag_chain(
+        llm=llm,
+        vectorstore=vectorstore,
+        filters=search_kwargs.get("filter"),
+        top_k=args.top_k,
+    )
+    if not rag_chain:
+        logger.error("Failed to setup RAG chain")
+        return None
+
+    chain = _CountingInvoker(rag_chain, stats)
+    if args.coalesce:
+        return lambda query: query_rag(chain, query)
+    return lambda query: chain.invoke({"query": query})
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", help="query log to replay (text or JSONL)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--rate", type=float, help="open-loop requests per second")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--filter-type", default="resume")
+    parser.add_argument(
+        "--retrieval-only", action="store_true", help="skip the LLM entirely"
+    )
+    parser.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="go through single-flight and the LLM scheduler like served queries",
+    )
+    parser.add_argument("--stub-latency", type=float, default=0.5)
+    parser.add_argument("--stub-jitter", type=float, default=0.1)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-slow-rate", type=float, default=0.0)
+    parser.add_argument("--stub-slow-latency", type=float, default=3.0)
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    queries = load_queries(args.queries)
+    if not queries:
+        logger.error("No queries to replay")
+        return None
+
+    stats = LoadStats()
+    query_fn = build_query_fn(args, stats)
+    if not query_fn:
+        return None
+
+    mode = f"{args.rate} req/s" if args.rate else f"concurrency {args.concurrency}"
+    logger.info(f"Running load test: {len(queries)} queries, {mode}, {args.duration}s")
+    report = run_load_test(
+        query_fn,
+        queries,
+        duration=args.duration,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        sample_interval=args.sample_interval,
+        stats=stats,
+    )
+
+    summary = {key: value for key, value in report.items() if key != "resources"}
+    logger.info(f"Load test report: {json.dumps(summary)}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        logger.info(f"Report written to: {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
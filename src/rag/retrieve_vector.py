@@ -1,17 +1,25 @@
 """Vector store retrieval and querying functionality."""
 
+import asyncio
 from typing import Optional
 
 from langchain.chains import RetrievalQA
 from langchain_chroma import Chroma
 from langchain_google_vertexai import ChatVertexAI
 
+from src.rag.sharded_store import get_shard_router, load_sharded_vector_store
+from src.rag.snapshot import SnapshotLoader
 from src.utils.logger import get_logger
 from src.utils.model import get_vertex_model
 from src.utils.rag_utils import load_vector_store, vectordb_path
+from src.utils.single_flight import SingleFlight
 
 logger = get_logger(__name__)
 
+# Identical queries against the same chain (same store, filters and top_k)
+# share one in-flight retrieval + LLM call.
+query_flight = SingleFlight(timeout=120)
+
 
 def setup_rag_chain(
     llm: ChatVertexAI,
@@ -44,7 +52,10 @@ def query_rag(rag_chain: RetrievalQA, query: str) -> Optional[str]:
 
     try:
         logger.info(f"Q: {query}")
-        answer = rag_chain.invoke({"query": query})
+        answer = query_flight.do(
+            (id(rag_chain), query),
+            lambda: rag_chain.invoke({"query": query}),
+        )
 
         if isinstance(answer, dict) and "result" in answer:
             result = answer["result"]
@@ -58,10 +69,26 @@ def query_rag(rag_chain: RetrievalQA, query: str) -> Optional[str]:
         return None
 
 
+async def aquery_rag(rag_chain: RetrievalQA, query: str) -> Optional[str]:
+    """Query the RAG system from async code."""
+    return await asyncio.to_thread(query_rag, rag_chain, query)
+
+
+def load_serving_vector_store():
+    """Load the store to serve from: latest snapshot, sharded store or live store."""
+    snapshot_loader = SnapshotLoader()
+    if snapshot_loader.refresh():
+        logger.info(f"Serving from snapshot {snapshot_loader.version}")
+        return snapshot_loader
+    if get_shard_router().enabled:
+        return load_sharded_vector_store(vectordb_path)
+    return load_vector_store(vectordb_path)
+
+
 def main():
     logger.info("Loading vector store for retrieval...")
 
-    vectorstore = load_vector_store(vectordb_path)
+    vectorstore = load_serving_vector_store()
     if not vectorstore:
         logger.error("Failed to load vector store")
         return None
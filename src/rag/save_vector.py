@@ -8,8 +8,19 @@ from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 
+from src.rag.sharded_store import (
+    ShardedVectorStore,
+    ShardRouter,
+    get_shard_router,
+    load_sharded_vector_store,
+)
 from src.utils.logger import get_logger
-from src.utils.rag_utils import create_embeddings, load_vector_store, vectordb_path
+from src.utils.rag_utils import (
+    create_embeddings,
+    load_vector_store,
+    vector_store_write_lock,
+    vectordb_path,
+)
 
 logger = get_logger(__name__)
 
@@ -87,9 +98,10 @@ def save_vector_store(
         embedding = create_embeddings()
 
         logger.info(f"Creating Chroma vectorstore in: {chroma_dir}")
-        vectorstore = Chroma.from_documents(
-            chunks, embedding, persist_directory=chroma_dir
-        )
+        with vector_store_write_lock(chroma_dir):
+            vectorstore = Chroma.from_documents(
+                chunks, embedding, persist_directory=chroma_dir
+            )
         logger.info("Vector store created and saved successfully.")
         return vectorstore
 
@@ -101,16 +113,20 @@ def save_vector_store(
 def add_documents_to_vector_store(
     documents: List[Document], chroma_dir: Optional[str] = None
 ) -> Optional[Chroma]:
-    """Add new documents to an existing vector store."""
+    """Add new documents to an existing vector store, routing to shards if enabled."""
     try:
-        vectorstore = load_vector_store(chroma_dir)
+        if get_shard_router().enabled:
+            vectorstore = load_sharded_vector_store(chroma_dir or vectordb_path)
+        else:
+            vectorstore = load_vector_store(chroma_dir)
         if not vectorstore:
             logger.error("No existing vector store found to add documents to.")
             return None
 
         chunks = split_documents(documents)
         logger.info("Adding new documents to existing vector store...")
-        vectorstore.add_documents(chunks)
+        with vector_store_write_lock(chroma_dir or vectordb_path):
+            vectorstore.add_documents(chunks)
         logger.info("Documents added successfully.")
         return vectorstore
 
@@ -119,11 +135,58 @@ def add_documents_to_vector_store(
         return None
 
 
+def save_sharded_vector_store(
+    documents: Optional[List[Document]] = None,
+    pdf_path: Optional[str] = None,
+    root: str = vectordb_path,
+    router: Optional[ShardRouter] = None,
+    chunk_size: int = 500,
+    chunk_overlap: int = 100,
+    force_recreate: bool = False,
+    extra_metadata: Optional[dict] = None,
+) -> Optional[ShardedVectorStore]:
+    """Split documents and upsert each chunk into its shard under root."""
+    try:
+        vectorstore = ShardedVectorStore(
+            root, create_embeddings(), router or get_shard_router()
+        )
+        if not force_recreate:
+            try:
+                if vectorstore.has_data():
+                    logger.info("Using existing sharded vector store with data.")
+                    return vectorstore
+            except Exception as e:
+                logger.warning(f"Could not inspect existing sharded store: {e}")
+
+        if documents is None:
+            documents = load_pdf_documents(pdf_path, extra_metadata=extra_metadata)
+            if documents is None:
+                return None
+
+        chunks = split_documents(documents, chunk_size, chunk_overlap)
+        logger.info(f"Writing chunks to sharded vector store in: {root}")
+        with vector_store_write_lock(root):
+            vectorstore.add_documents(chunks)
+        logger.info("Sharded vector store saved successfully.")
+        return vectorstore
+
+    except Exception as e:
+        logger.error(f"Error saving sharded vector store: {str(e)}")
+        return None
+
+
 def main():
     logger.info("Creating vector store...")
     pdf_path = "data/BHASKAR_SAIKIA_LMLE.pdf"
     extra_metadata = {"type": "resume", "source": pdf_path}
-    vectorstore = save_vector_store(pdf_path=pdf_path, extra_metadata=extra_metadata)
+    if get_shard_router().enabled:
+        vectorstore = save_sharded_vector_store(
+            pdf_path=pdf_path, extra_metadata=extra_metadata
+        )
+    else:
+        vectorstore = save_vector_store(
+            pdf_path=pdf_path, extra_metadata=extra_metadata
+        )
     if not vectorstore:
         logger.error("Failed to create vector store.")
     else:
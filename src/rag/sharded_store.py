@@ -0,0 +1,227 @@
+"""Vector store sharded across several Chroma persist directories."""
+
+import hashlib
+import heapq
+import os
+import re
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+from langchain_chroma import Chroma
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from src.utils.logger import get_logger
+from src.utils.rag_utils import create_embeddings, rag_config, vectordb_path
+
+logger = get_logger(__name__)
+
+SHARD_DIR_PREFIX = "shard_"
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.=-]", "_", value)
+
+
+class ShardRouter:
+    """
+    Decides which shard a chunk belongs to.
+    Chunks carrying `shard_key` in their metadata go to the shard named after
+    that value; all other chunks are spread over `num_shards` shards by a hash
+    of their source (or of their content when they have none), so every chunk
+    of a file, and therefore every chunk id, always lands in the same shard.
+    """
+
+    def __init__(self, shard_key: Optional[str] = None, num_shards: int = 1):
+        self.shard_key = shard_key
+        self.num_shards = max(1, num_shards or 1)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.shard_key) or self.num_shards > 1
+
+    def shard_for(self, document: Document) -> str:
+        if self.shard_key:
+            value = document.metadata.get(self.shard_key)
+            if value is not None:
+                return _safe_name(f"{self.shard_key}={value}")
+        key = document.metadata.get("source") or document.page_content
+        digest = hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+        return f"hash-{int(digest, 16) % self.num_shards}"
+
+    def shards_for_filter(
+        self, filters: Optional[dict], shard_names: List[str]
+    ) -> List[str]:
+        """Shards that can hold matches for the given metadata filter."""
+        value = (filters or {}).get(self.shard_key) if self.shard_key else None
+        if isinstance(value, (str, int, float, bool)):
+            name = _safe_name(f"{self.shard_key}={value}")
+            return [name] if name in shard_names else []
+        return shard_names
+
+
+def chunk_ids(documents: List[Document]) -> List[str]:
+    """
+    Deterministic ids from each chunk's source, page and position within that
+    page, so re-ingesting a file overwrites its chunks instead of duplicating
+    them. Chunks without a source fall back to a hash of their content, plus
+    their occurrence number when the same content repeats, so ids are unique
+    within a call.
+    """
+    positions: Dict[tuple, int] = defaultdict(int)
+    ids = []
+    for document in documents:
+        source = document.metadata.get("source")
+        if source is None:
+            key = document.page_content
+            occurrence = positions[(None, key)]
+            positions[(None, key)] += 1
+            if occurrence:
+                key = f"{key}:{occurrence}"
+        else:
+            page = document.metadata.get("page")
+            index = positions[(source, page)]
+            positions[(source, page)] += 1
+            key = f"{source}:{page}:{index}"
+        ids.append(hashlib.sha1(key.encode("utf-8")).hexdigest())
+    return ids
+
+
+def get_shard_router() -> ShardRouter:
+    """Build the shard router from the RAG config."""
+    return ShardRouter(
+        shard_key=rag_config.get("shard_key"),
+        num_shards=rag_config.get("num_shards") or 1,
+    )
+
+
+class ShardedVectorStore:
+    """Routes writes to shards and fans searches out to them in parallel."""
+
+    def __init__(
+        self,
+        root: str,
+        embedding: Embeddings,
+        router: ShardRouter,
+        max_workers: Optional[int] = None,
+    ):
+        self.root = root
+        self.embedding = embedding
+        self.router = router
+        self._shards: Dict[str, Chroma] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4),
+            thread_name_prefix="shard",
+        )
+
+        if os.path.isdir(root):
+            for entry in sorted(os.listdir(root)):
+                if entry.startswith(SHARD_DIR_PREFIX):
+                    self._shard(entry[len(SHARD_DIR_PREFIX) :])
+
+    def shard_names(self) -> List[str]:
+        with self._lock:
+            return list(self._shards)
+
+    def _shard(self, name: str) -> Chroma:
+        with self._lock:
+            shard = self._shards.get(name)
+            if shard is None:
+                shard = Chroma(
+                    persist_directory=os.path.join(self.root, SHARD_DIR_PREFIX + name),
+                    embedding_function=self.embedding,
+                )
+                self._shards[name] = shard
+            return shard
+
+    def add_documents(
+        self, documents: List[Document], ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Upsert documents, each into the shard chosen by the router."""
+        ids = ids or chunk_ids(documents)
+        grouped = defaultdict(lambda: ([], []))
+        for document, doc_id in zip(documents, ids):
+            docs, doc_ids = grouped[self.router.shard_for(document)]
+            docs.append(document)
+            doc_ids.append(doc_id)
+
+        futures = [
+            self._executor.submit(self._shard(name).add_documents, docs, ids=doc_ids)
+            for name, (docs, doc_ids) in grouped.items()
+        ]
+        logger.info(f"Added {len(documents)} chunks across {len(grouped)} shard(s).")
+        return [doc_id for future in futures for doc_id in future.result()]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None
+    ) -> List[Tuple[Document, float]]:
+        """Search the relevant shards in parallel and merge the top-k by distance."""
+        names = self.router.shards_for_filter(filter, self.shard_names())
+        if not names:
+            return []
+
+        query_vector = self.embedding.embed_query(query)
+        futures = [
+            self._executor.submit(
+                self._shard(name).similarity_search_by_vector_with_relevance_scores,
+                query_vector,
+                k=k,
+                filter=filter,
+            )
+            for name in names
+        ]
+        results = [pair for future in futures for pair in future.result()]
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def has_data(self) -> bool:
+        return any(self._shard(name).get(limit=1)["ids"] for name in self.shard_names())
+
+    def as_retriever(self, search_kwargs: Optional[dict] = None) -> "ShardedRetriever":
+        return ShardedRetriever(store=self, search_kwargs=search_kwargs or {})
+
+
+class ShardedRetriever(BaseRetriever):
+    """Retriever over a ShardedVectorStore, usable in RetrievalQA."""
+
+    store: Any
+    search_kwargs: dict = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.store.similarity_search(
+            query,
+            k=self.search_kwargs.get("k", 4),
+            filter=self.search_kwargs.get("filter"),
+        )
+
+
+def load_sharded_vector_store(
+    root: str = vectordb_path, router: Optional[ShardRouter] = None
+) -> Optional[ShardedVectorStore]:
+    """Open every shard under root."""
+    try:
+        if not os.path.exists(root):
+            logger.error(f"Sharded vector store not found at: {root}")
+            return None
+
+        logger.info(f"Loading sharded vector store from: {root}")
+        store = ShardedVectorStore(
+            root, create_embeddings(batched=True), router or get_shard_router()
+        )
+        logger.info(f"Loaded {len(store.shard_names())} shard(s)")
+        return store
+
+    except Exception as e:
+        logger.error(f"Error loading sharded vector store: {str(e)}")
+        return None
@@ -0,0 +1,324 @@
+"""
+Versioned snapshots of the vector store for serving workers.
+A snapshot directory is never modified after it is published: each worker
+opens its own private copy, so workers neither write to the published files
+nor contend with ingestion or with each other for SQLite locks.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from chromadb.api.shared_system_client import SharedSystemClient
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+from src.rag.sharded_store import (
+    SHARD_DIR_PREFIX,
+    ShardedVectorStore,
+    load_sharded_vector_store,
+)
+from src.utils.logger import get_logger
+from src.utils.rag_utils import (
+    INGEST_STATE_FILE,
+    WRITE_LOCK_FILE,
+    load_vector_store,
+    rag_config,
+    vector_store_write_lock,
+    vectordb_path,
+)
+
+logger = get_logger(__name__)
+
+snapshot_path = rag_config.get("snapshot_path") or f"{vectordb_path}_snapshots"
+LATEST_FILE = "LATEST"
+MANIFEST_FILE = "manifest.json"
+SQLITE_SUFFIXES = (".sqlite3", ".sqlite3-wal", ".sqlite3-shm", ".sqlite3-journal")
+
+
+def _copy_sqlite(source: str, target: str) -> None:
+    """Copy a live SQLite database consistently and compact the copy."""
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        dst.execute("VACUUM")
+    finally:
+        src.close()
+        dst.close()
+
+
+def _copy_store(source: str, target: str) -> List[str]:
+    """
+    Copy a persist directory. Segment files are copied before the SQLite
+    backup is taken, so the database is never older than the index files; the
+    caller holds the store's write lock so no write lands in between.
+    """
+    shutil.copytree(
+        source,
+        target,
+        ignore=shutil.ignore_patterns(
+            WRITE_LOCK_FILE,
+            INGEST_STATE_FILE,
+            *(f"*{s}" for s in SQLITE_SUFFIXES),
+        ),
+    )
+    files = []
+    for dirpath, _, filenames in os.walk(source):
+        for filename in filenames:
+            if filename in (WRITE_LOCK_FILE, INGEST_STATE_FILE):
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, filename), source)
+            if filename.endswith(".sqlite3"):
+                _copy_sqlite(os.path.join(dirpath, filename), os.path.join(target, rel))
+            if not filename.endswith(SQLITE_SUFFIXES[1:]):
+                files.append(rel)
+    return sorted(files)
+
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def list_snapshots(snapshot_root: str = snapshot_path) -> List[str]:
+    """Published snapshot versions, oldest first."""
+    if not os.path.isdir(snapshot_root):
+        return []
+    return sorted(
+        entry
+        for entry in os.listdir(snapshot_root)
+        if os.path.exists(os.path.join(snapshot_root, entry, MANIFEST_FILE))
+    )
+
+
+def latest_snapshot(snapshot_root: str = snapshot_path) -> Optional[str]:
+    """Version named by the LATEST pointer, if any."""
+    try:
+        with open(
+            os.path.join(snapshot_root, LATEST_FILE), "r", encoding="utf-8"
+        ) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def build_snapshot(
+    source: str = vectordb_path,
+    snapshot_root: str = snapshot_path,
+    keep: int = 3,
+) -> Optional[str]:
+    """
+    Copy the live store into a new versioned snapshot, publish it as LATEST
+    and prune all but the `keep` most recent versions. Returns the version.
+    The new and the previous LATEST are never pruned (keep is at least 2), so a
+    SnapshotLoader still serving the previous version has until `keep - 1`
+    further snapshots are published to refresh.
+    """
+    try:
+        if not os.path.exists(source):
+            logger.error(f"Vector store not found at: {source}")
+            return None
+
+        os.makedirs(snapshot_root, exist_ok=True)
+        version = datetime.now(timezone.utc).strftime("v%Y%m%d%H%M%S%f")
+        staging = os.path.join(snapshot_root, f".staging-{version}")
+
+        logger.info(f"Building snapshot {version} from: {source}")
+        with vector_store_write_lock(source):
+            files = _copy_store(source, staging)
+        manifest = {
+            "version": version,
+            "source": os.path.abspath(source),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "sharded": any(
+                entry.startswith(SHARD_DIR_PREFIX) for entry in os.listdir(staging)
+            ),
+            "files": files,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+
+        previous = latest_snapshot(snapshot_root)
+        os.replace(staging, os.path.join(snapshot_root, version))
+        _write_atomic(os.path.join(snapshot_root, LATEST_FILE), version)
+        logger.info(f"Published snapshot {version}")
+
+        for old in list_snapshots(snapshot_root)[: -max(keep, 2)]:
+            if old not in (version, previous):
+                shutil.rmtree(os.path.join(snapshot_root, old), ignore_errors=True)
+                logger.info(f"Pruned snapshot {old}")
+        return version
+
+    except Exception as e:
+        logger.error(f"Error building snapshot: {str(e)}")
+        return None
+
+
+def load_snapshot(snapshot_root: str, version: str) -> Optional[Any]:
+    """Open a published snapshot as a vector store."""
+    path = os.path.join(snapshot_root, version)
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Invalid snapshot {version}: {e}")
+        return None
+
+    if manifest.get("sharded"):
+        return load_sharded_vector_store(path)
+    return load_vector_store(path)
+
+
+def _private_copy(
+    snapshot_root: str, version: str, workdir: Optional[str] = None
+) -> str:
+    """Copy a published snapshot into a new directory owned by this process."""
+    root = tempfile.mkdtemp(prefix="rag-snapshot-", dir=workdir)
+    try:
+        shutil.copytree(
+            os.path.join(snapshot_root, version), os.path.join(root, version)
+        )
+    except Exception:
+        shutil.rmtree(root, ignore_errors=True)
+        raise
+    return root
+
+
+def _release_store(store: Any, private_root: Optional[str]) -> None:
+    """Stop the Chroma clients behind a store and delete its private copy."""
+    if isinstance(store, ShardedVectorStore):
+        shards = [store._shard(name) for name in store.shard_names()]
+    else:
+        shards = [store]
+    for shard in shards:
+        identifier = getattr(getattr(shard, "_client", None), "_identifier", None)
+        system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+        if system is not None:
+            try:
+                system.stop()
+            except Exception as e:
+                logger.warning(f"Error closing snapshot client: {str(e)}")
+    if private_root:
+        shutil.rmtree(private_root, ignore_errors=True)
+
+
+class SnapshotLoader:
+    """
+    Serves from the latest snapshot and swaps to newer ones atomically.
+    Readers always see one complete snapshot; the swap is a single reference
+    assignment once the new store has been opened. Each version is opened
+    from a private copy under `workdir` (the system temp dir by default). The
+    version swapped out stays open for queries still running on it and is
+    released at the next swap.
+    """
+
+    def __init__(
+        self, snapshot_root: str = snapshot_path, workdir: Optional[str] = None
+    ):
+        self.snapshot_root = snapshot_root
+        self.workdir = workdir
+        self.version: Optional[str] = None
+        self._store: Any = None
+        self._private_root: Optional[str] = None
+        self._retired: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._bg_logger = get_logger(__name__, background=True)
+
+    def get(self) -> Any:
+        return self._store
+
+    def refresh(self) -> bool:
+        """Switch to the latest snapshot if it changed. True if a store is loaded."""
+        with self._lock:
+            latest = latest_snapshot(self.snapshot_root)
+            if latest is None or latest == self.version:
+                return self._store is not None
+
+            try:
+                private_root = _private_copy(self.snapshot_root, latest, self.workdir)
+            except Exception as e:
+                logger.error(f"Error copying snapshot {latest}: {str(e)}")
+                return self._store is not None
+
+            store = load_snapshot(private_root, latest)
+            if store is None:
+                shutil.rmtree(private_root, ignore_errors=True)
+                return self._store is not None
+
+            previous = self.version
+            retired = self._retired
+            if self._store is not None:
+                self._retired = (self._store, self._private_root)
+            self._store, self.version = store, latest
+            self._private_root = private_root
+            logger.info(f"Serving snapshot {latest} (previous: {previous})")
+            if retired:
+                _release_store(*retired)
+            return True
+
+    def start(self, interval: float = 30.0) -> None:
+        """Poll for new snapshots in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._poll, args=(interval,), name="snapshot-loader", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _poll(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self._bg_logger.error(f"Snapshot refresh failed: {str(e)}")
+
+    def as_retriever(self, search_kwargs: Optional[dict] = None) -> "SnapshotRetriever":
+        return SnapshotRetriever(loader=self, search_kwargs=search_kwargs or {})
+
+
+class SnapshotRetriever(BaseRetriever):
+    """Retriever that always searches the loader's current snapshot."""
+
+    loader: Any
+    search_kwargs: dict = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        store = self.loader.get()
+        if store is None:
+            return []
+        return store.as_retriever(search_kwargs=self.search_kwargs).invoke(query)
+
+
+def main():
+    start = time.monotonic()
+    version = build_snapshot()
+    if not version:
+        logger.error("Failed to build snapshot.")
+    else:
+        logger.info(f"Snapshot {version} built in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Micro-batching of query embeddings across concurrent requests."""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__, background=True)
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Wraps an embedding model so concurrent embed_query calls are collected for
+    up to max_wait seconds (or until max_batch_size queries are waiting) and
+    embedded together in one batched query-encoding call. Document embedding
+    is passed straight through.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def submit(self, text: str) -> Future:
+        """Queue a query for the next batch and return a future for its vector."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return batch
+
+    def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts as queries. HuggingFaceEmbeddings encodes queries with
+        query_encode_kwargs (e.g. a query prompt), so its batch encoder is
+        called with those; other models are embedded one query at a time
+        rather than through embed_documents, which may encode differently.
+        """
+        embed = getattr(self.embeddings, "_embed", None)
+        if embed is not None and hasattr(self.embeddings, "query_encode_kwargs"):
+            encode_kwargs = (
+                self.embeddings.query_encode_kwargs or self.embeddings.encode_kwargs
+            )
+            return embed(texts, encode_kwargs)
+        return [self.embeddings.embed_query(text) for text in texts]
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._process(self._collect())
+            except Exception as e:
+                logger.error(f"Embedding batcher error: {str(e)}")
+
+    def _process(self, batch: List[Tuple[str, Future]]) -> None:
+        # Callers that were cancelled while queued are dropped; the rest are
+        # marked running so they can no longer be cancelled.
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(texts, self._embed_queries(texts)))
+        except Exception as e:
+            logger.error(f"Error embedding batch of {len(texts)} queries: {str(e)}")
+            for _, future in batch:
+                self._settle(future, exception=e)
+            return
+        for text, future in batch:
+            self._settle(future, result=vectors[text])
+
+    @staticmethod
+    def _settle(
+        future: Future,
+        result: Optional[List[float]] = None,
+        exception: Optional[BaseException] = None,
+    ) -> None:
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
@@ -0,0 +1,318 @@
+"""Client-side scheduling of LLM calls: adaptive concurrency, rate limiting, retries and hedging."""
+
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional
+
+from src.config.llm_config import get_llm_config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+OVERLOAD_CODES = {429, 503}
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when a scheduled LLM call cannot complete before its deadline."""
+
+
+class _HedgeSkipped(Exception):
+    """A hedged attempt was dropped because there was no spare capacity."""
+
+
+def _error_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "code", None)
+    if callable(code):
+        try:
+            code = code()
+        except Exception:
+            return None
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """True for quota / overload errors (429, 503) that should shrink concurrency."""
+    return _error_code(exc) in OVERLOAD_CODES
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """True for transient errors worth retrying."""
+    if isinstance(exc, (ConnectionError, TimeoutError)) and not isinstance(
+        exc, LLMDeadlineExceeded
+    ):
+        return True
+    return _error_code(exc) in RETRYABLE_CODES
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit.
+    Grows by `increase` per window of successful calls and is multiplied by
+    `decrease_factor` on overload errors, at most once per window: overloads
+    from calls that started before the last decrease are ignored, so a burst
+    of concurrent 429s only halves the limit once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.epoch = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            ok = self._cond.wait_for(
+                lambda: self.in_flight < int(self.limit), timeout=timeout
+            )
+            if ok:
+                self.in_flight += 1
+            return ok
+
+    def release(
+        self,
+        overloaded: bool = False,
+        success: bool = True,
+        epoch: Optional[int] = None,
+    ) -> None:
+        """Return a slot; `epoch` is the value of self.epoch when the call started."""
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                if epoch is None or epoch == self.epoch:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self.epoch += 1
+            elif success:
+                self.limit = min(
+                    self.max_limit, self.limit + self.increase / self.limit
+                )
+            self._cond.notify_all()
+
+
+class TokenBucket:
+    """Token-bucket rate limiter; a rate of None or 0 disables limiting."""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst or rate or 1))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        if not self.rate:
+            return True
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        if not self.rate:
+            return True
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_for = (1 - self.tokens) / self.rate
+            if end is not None:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_for = min(wait_for, remaining)
+            time.sleep(wait_for)
+
+
+class LLMScheduler:
+    """
+    Runs LLM calls through a token bucket and an AIMD concurrency limit,
+    retrying transient errors with full-jitter exponential backoff until the
+    deadline. If hedge_after is set, a second attempt is started when the first
+    has not returned within that many seconds and capacity is available; the
+    first successful result wins.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[AIMDLimiter] = None,
+        bucket: Optional[TokenBucket] = None,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        deadline: float = 60.0,
+        hedge_after: Optional[float] = None,
+        retryable: Callable[[BaseException], bool] = is_retryable_error,
+    ):
+        self.limiter = limiter or AIMDLimiter()
+        self.bucket = bucket or TokenBucket()
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.retryable = retryable
+        self._executor = (
+            ThreadPoolExecutor(
+                max_workers=int(self.limiter.max_limit) * 2,
+                thread_name_prefix="llm-hedge",
+            )
+            if hedge_after
+            else None
+        )
+
+    def call(self, fn: Callable[[], Any], deadline: Optional[float] = None) -> Any:
+        """Run fn under the scheduler's limits, retrying until the deadline."""
+        end = time.monotonic() + (self.deadline if deadline is None else deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            if end - time.monotonic() <= 0:
+                raise LLMDeadlineExceeded("LLM call deadline exceeded")
+            try:
+                if self._executor:
+                    return self._hedged(fn, end)
+                return self._guarded(fn, end)
+            except Exception as e:
+                if attempt >= self.max_attempts or not self.retryable(e):
+                    raise
+                backoff = random.uniform(
+                    0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                )
+                backoff = min(backoff, end - time.monotonic())
+                if backoff <= 0:
+                    raise
+                logger.warning(
+                    f"LLM call failed (attempt {attempt}/{self.max_attempts}): {e}; "
+                    f"retrying in {backoff:.2f}s"
+                )
+                time.sleep(backoff)
+
+    def _guarded(self, fn: Callable[[], Any], end: float, hedge: bool = False) -> Any:
+        # The remaining time is taken when the attempt actually starts, so an
+        # attempt that sat in the executor queue past the deadline never runs.
+        timeout = end - time.monotonic()
+        if timeout <= 0:
+            raise LLMDeadlineExceeded("LLM call deadline exceeded")
+        if hedge:
+            # Take the concurrency slot first: a slot can be handed back
+            # without side effects, a rate-limit token cannot.
+            if not self.limiter.try_acquire():
+                raise _HedgeSkipped()
+            if not self.bucket.try_acquire():
+                self.limiter.release(success=False)
+                raise _HedgeSkipped()
+        else:
+            if not self.bucket.acquire(timeout):
+                raise LLMDeadlineExceeded("Rate limit: no token before deadline")
+            if not self.limiter.acquire(end - time.monotonic()):
+                raise LLMDeadlineExceeded("Concurrency limit: no slot before deadline")
+        epoch = self.limiter.epoch
+
+        try:
+            result = fn()
+        except Exception as e:
+            self.limiter.release(
+                overloaded=is_overload_error(e), success=False, epoch=epoch
+            )
+            raise
+        self.limiter.release(epoch=epoch)
+        return result
+
+    def _hedged(self, fn: Callable[[], Any], end: float) -> Any:
+        futures = [self._executor.submit(self._guarded, fn, end)]
+        try:
+            done, _ = wait(
+                futures, timeout=min(self.hedge_after, end - time.monotonic())
+            )
+            if done:
+                return futures[0].result()
+
+            futures.append(self._executor.submit(self._guarded, fn, end, True))
+            pending = set(futures)
+            error = None
+            while pending:
+                done, pending = wait(
+                    pending,
+                    timeout=max(0, end - time.monotonic()),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    raise LLMDeadlineExceeded("LLM call deadline exceeded")
+                for future in done:
+                    exc = future.exception()
+                    if exc is None:
+                        return future.result()
+                    if not isinstance(exc, _HedgeSkipped):
+                        error = exc
+            raise error
+        finally:
+            # Attempts still queued are dropped; running ones cannot be
+            # interrupted but release their slot when they finish.
+            for future in futures:
+                future.cancel()
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def create_scheduler(scheduler_config: dict) -> LLMScheduler:
+    """Build a scheduler from the `scheduler` section of the LLM config."""
+    max_concurrency = scheduler_config.get("max_concurrency") or 64
+    return LLMScheduler(
+        limiter=AIMDLimiter(
+            initial_limit=scheduler_config.get("initial_concurrency") or 4,
+            max_limit=max_concurrency,
+        ),
+        bucket=TokenBucket(
+            rate=scheduler_config.get("rate_limit_per_sec"),
+            burst=scheduler_config.get("burst"),
+        ),
+        max_attempts=scheduler_config.get("max_attempts") or 4,
+        deadline=scheduler_config.get("deadline_seconds") or 60.0,
+        hedge_after=scheduler_config.get("hedge_after_seconds"),
+    )
+
+
+def get_scheduler() -> LLMScheduler:
+    """Return the process-wide LLM scheduler, creating it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = create_scheduler(get_llm_config()["scheduler"])
+        return _scheduler
@@ -1,7 +1,17 @@
-from langchain_core.messages import AIMessage
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
 from langchain_google_vertexai import ChatVertexAI
 
 from src.config.llm_config import get_llm_config
+from src.utils.llm_scheduler import (
+    LLMDeadlineExceeded,
+    get_scheduler,
+    is_overload_error,
+)
 from src.utils.logger import get_logger
 
 RESPONSE_MATCHING_PATTERN = r"Prompt:.*?Output:(.*)"
@@ -10,15 +20,48 @@ RESPONSE_MATCHING_PATTERN = r"Prompt:.*?Output:(.*)"
 logger = get_logger(__name__)
 
 
+class ScheduledChatModel(BaseChatModel):
+    """
+    Sends every generation of the wrapped chat model through the LLM
+    scheduler, so chains only count the LLM call itself against the
+    concurrency and rate limits and a retry does not rerun retrieval.
+    """
+
+    model: BaseChatModel
+
+    @property
+    def _llm_type(self) -> str:
+        return f"scheduled-{self.model._llm_type}"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = get_scheduler().call(
+            lambda: self.model.invoke(messages, stop=stop, **kwargs)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
 def get_model_response(prompt: str) -> dict:
-    """Fetch response from the LLM based on the given prompt."""
+    """
+    Fetch response from the LLM based on the given prompt.
+    LLMDeadlineExceeded and quota errors (429/503) that outlast the
+    scheduler's retries are raised so callers can shed or back off; other
+    failures return an error response naming the exception.
+    """
     config = get_llm_config()
     model_config, generation_config = config["model"], config["generation"]
 
     try:
         if model_config.get("model_name"):
-            response = get_model_response_with_model_name(
-                prompt, model_config, generation_config
+            response = get_scheduler().call(
+                lambda: get_model_response_with_model_name(
+                    prompt, model_config, generation_config
+                )
             )
         else:
             logger.error("No model_name provided in config")
@@ -46,9 +89,18 @@ def get_model_response(prompt: str) -> dict:
             "response_metadata": {},
         }
 
+    except LLMDeadlineExceeded as e:
+        logger.error(f"LLM request deadline exceeded: {str(e)}")
+        raise
     except Exception as e:
+        if is_overload_error(e):
+            logger.error(f"LLM quota exhausted: {str(e)}")
+            raise
         logger.error(f"Error processing LLM request: {str(e)}")
-        return {"content": "Error: Unable to process request.", "response_metadata": {}}
+        return {
+            "content": f"Error: Unable to process request ({type(e).__name__}).",
+            "response_metadata": {"error": type(e).__name__, "error_message": str(e)},
+        }
 
 
 def get_model_response_with_model_name(
@@ -60,6 +112,8 @@ def get_model_response_with_model_name(
         temperature=generation_config.get("temperature", 0.2),
         project=model_config.get("project_id"),
         location=model_config.get("location"),
+        # Retries are handled by the LLM scheduler so 429s reach its limiter.
+        max_retries=0,
     )
     response = model.invoke(prompt)
 
@@ -70,14 +124,17 @@ def get_model_response_with_model_name(
     return AIMessage(content=str(response))
 
 
-def get_vertex_model() -> ChatVertexAI:
+def get_vertex_model() -> ScheduledChatModel:
 
     config = get_llm_config()
     model_config, generation_config = config["model"], config["generation"]
 
-    return ChatVertexAI(
-        model=model_config["model_name"],
-        temperature=generation_config.get("temperature", 0.2),
-        project=model_config.get("project_id"),
-        location=model_config.get("location"),
+    return ScheduledChatModel(
+        model=ChatVertexAI(
+            model=model_config["model_name"],
+            temperature=generation_config.get("temperature", 0.2),
+            project=model_config.get("project_id"),
+            location=model_config.get("location"),
+            max_retries=0,
+        )
     )
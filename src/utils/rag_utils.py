@@ -1,9 +1,14 @@
+import fcntl
 import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Union
 
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 
 from src.config.llm_config import get_llm_config
+from src.utils.embedding_batcher import BatchingEmbeddings
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -11,10 +16,30 @@ config = get_llm_config()
 rag_config = config["rag"]
 model_config = config["model"]
 vectordb_path = rag_config.get("vectordb_path")
+WRITE_LOCK_FILE = ".write.lock"
+INGEST_STATE_FILE = ".ingested.json"
 
+# Shared so every store in the process batches queries through one model.
+_batched_embeddings = None
+_batched_embeddings_lock = threading.Lock()
+
+
+def create_embeddings(
+    batched: bool = False,
+) -> Union[HuggingFaceEmbeddings, BatchingEmbeddings]:
+    """Create embedding model, optionally micro-batching query embeddings."""
+    global _batched_embeddings
+    batch_size = rag_config.get("embedding_batch_size") or 1
+    if batched and batch_size > 1:
+        with _batched_embeddings_lock:
+            if _batched_embeddings is None:
+                _batched_embeddings = BatchingEmbeddings(
+                    create_embeddings(),
+                    max_batch_size=batch_size,
+                    max_wait=(rag_config.get("embedding_batch_wait_ms") or 0) / 1000,
+                )
+            return _batched_embeddings
 
-def create_embeddings() -> HuggingFaceEmbeddings:
-    """Create embedding model."""
     embedding = HuggingFaceEmbeddings(
         model_name=model_config.get("embedding_model_name")
     )
@@ -31,7 +56,7 @@ def load_vector_store(chroma_dir: str = vectordb_path) -> Chroma:
             return None
 
         logger.info(f"Loading vector store from: {chroma_dir}")
-        embedding = create_embeddings()
+        embedding = create_embeddings(batched=True)
         vectorstore = Chroma(persist_directory=chroma_dir, embedding_function=embedding)
         logger.info("Vector store loaded successfully")
         return vectorstore
@@ -39,3 +64,24 @@ def load_vector_store(chroma_dir: str = vectordb_path) -> Chroma:
     except Exception as e:
         logger.error(f"Error loading vector store: {str(e)}")
         return None
+
+
+@contextmanager
+def vector_store_write_lock(chroma_dir: str = vectordb_path) -> Iterator[None]:
+    """
+    Exclusive, cross-process lock on a persist directory.
+    Writers hold it while changing the store and snapshots hold it while
+    copying, so a snapshot never mixes files from before and after a write.
+    A directory that does not exist yet has nothing to snapshot, so no lock
+    is taken.
+    """
+    if not os.path.isdir(chroma_dir):
+        yield
+        return
+
+    with open(os.path.join(chroma_dir, WRITE_LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
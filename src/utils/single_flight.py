@@ -0,0 +1,82 @@
+"""Single-flight coalescing of identical in-flight calls."""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Call:
+    """State of one in-flight execution shared by all callers of a key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one execution per key at a time.
+    Callers arriving while a key is in flight wait for and share its result,
+    or re-raise its exception. The timeout bounds how long a waiting caller
+    blocks; the leading call itself always runs to completion.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(
+        self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None
+    ) -> Any:
+        """Run fn for key, or join the execution already in flight for it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+                if call.waiters:
+                    logger.info(
+                        f"Coalesced {call.waiters} duplicate call(s) for {key!r}"
+                    )
+            return call.result
+
+        wait_timeout = self.timeout if timeout is None else timeout
+        if not call.done.wait(wait_timeout):
+            raise TimeoutError(
+                f"Timed out after {wait_timeout}s waiting for in-flight call {key!r}"
+            )
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def ado(
+        self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None
+    ) -> Any:
+        """Async variant of do; shares in-flight executions with sync callers."""
+        return await asyncio.to_thread(self.do, key, fn, timeout)
+
+    def in_flight(self) -> int:
+        """Number of keys currently executing."""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,73 @@
+"""Local stand-in for ChatVertexAI that simulates latency and quota errors."""
+
+import random
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+
+class StubRateLimitError(Exception):
+    """Mimics a Vertex 429 / ResourceExhausted error."""
+
+    code = 429
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that sleeps instead of calling an API.
+    latency +/- latency_jitter is the normal response time; a slow_rate fraction
+    of calls take slow_latency instead (tail latency). error_rate is the
+    fraction of calls raising StubRateLimitError, and the first fail_first
+    calls always raise it.
+    """
+
+    response: str = "Stub response."
+    latency: float = 0.05
+    latency_jitter: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 1.0
+    error_rate: float = 0.0
+    fail_first: int = 0
+
+    _calls: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    @property
+    def calls(self) -> int:
+        """Number of calls made so far, including failed ones."""
+        return self._calls
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        with self._lock:
+            self._calls += 1
+            call_number = self._calls
+
+        if random.random() < self.slow_rate:
+            delay = self.slow_latency
+        else:
+            delay = self.latency + random.uniform(
+                -self.latency_jitter, self.latency_jitter
+            )
+        time.sleep(max(0.0, delay))
+
+        if call_number <= self.fail_first or random.random() < self.error_rate:
+            raise StubRateLimitError("429 Resource exhausted (stub)")
+
+        message = AIMessage(content=self.response)
+        return ChatResult(generations=[ChatGeneration(message=message)])
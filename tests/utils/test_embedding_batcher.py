@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.utils.rag_utils as rag_utils
+from src.utils.embedding_batcher import BatchingEmbeddings
+
+
+class FakeEmbeddings:
+    encode_kwargs = {}
+    query_encode_kwargs = {"prompt": "query: "}
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.encode_calls = []
+
+    def _embed(self, texts, encode_kwargs):
+        self.batches.append(list(texts))
+        self.encode_calls.append(encode_kwargs)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model down")
+        return [[float(len(text))] for text in texts]
+
+    def embed_documents(self, texts):
+        return self._embed(texts, self.encode_kwargs)
+
+
+def embed_concurrently(batcher, texts):
+    results = {}
+
+    def worker(text):
+        results[text] = batcher.embed_query(text)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+@pytest.mark.unit
+def test_concurrent_queries_share_one_batch():
+    inner = FakeEmbeddings()
+    batcher = BatchingEmbeddings(inner, max_batch_size=8, max_wait=0.1)
+
+    results = embed_concurrently(batcher, ["a", "bb", "ccc"])
+
+    assert results == {"a": [1.0], "bb": [2.0], "ccc": [3.0]}
+    assert len(inner.batches) == 1
+    assert sorted(inner.batches[0]) == ["a", "bb", "ccc"]
+    assert inner.encode_calls == [FakeEmbeddings.query_encode_kwargs]
+
+
+@pytest.mark.unit
+def test_batches_are_capped_at_max_batch_size():
+    inner = FakeEmbeddings(delay=0.05)
+    batcher = BatchingEmbeddings(inner, max_batch_size=2, max_wait=0.1)
+
+    results = embed_concurrently(batcher, ["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert len(results) == 5
+    assert all(len(batch) <= 2 for batch in inner.batches)
+
+
+@pytest.mark.unit
+def test_duplicate_queries_embedded_once():
+    inner = FakeEmbeddings()
+    batcher = BatchingEmbeddings(inner, max_batch_size=8, max_wait=0.1)
+
+    futures = [batcher.submit("same") for _ in range(3)]
+
+    assert [f.result() for f in futures] == [[4.0]] * 3
+    assert inner.batches == [["same"]]
+
+
+@pytest.mark.unit
+def test_errors_propagate_to_every_caller():
+    batcher = BatchingEmbeddings(FakeEmbeddings(fail=True), max_wait=0.05)
+
+    futures = [batcher.submit("a"), batcher.submit("b")]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result()
+
+
+@pytest.mark.unit
+def test_cancelled_caller_does_not_stall_others():
+    inner = FakeEmbeddings(delay=0.05)
+    batcher = BatchingEmbeddings(inner, max_batch_size=1, max_wait=0.01)
+
+    first = batcher.submit("a")
+    cancelled = batcher.submit("bb")
+    assert cancelled.cancel()
+    last = batcher.submit("ccc")
+
+    assert first.result(timeout=2) == [1.0]
+    assert last.result(timeout=2) == [3.0]
+    assert ["bb"] not in inner.batches
+
+
+@pytest.mark.unit
+def test_aembed_query_cancellation_keeps_worker_alive():
+    inner = FakeEmbeddings(delay=0.1)
+    batcher = BatchingEmbeddings(inner, max_wait=0.05)
+
+    async def run():
+        task = asyncio.ensure_future(batcher.aembed_query("a"))
+        other = asyncio.ensure_future(batcher.aembed_query("bb"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        return await asyncio.wait_for(other, timeout=2)
+
+    assert asyncio.run(run()) == [2.0]
+    assert batcher.embed_query("ccc") == [3.0]
+
+
+@pytest.mark.unit
+def test_models_without_query_encoder_embed_queries_individually():
+    inner = MagicMock(spec=["embed_query", "embed_documents"])
+    inner.embed_query.side_effect = lambda text: [float(len(text))]
+    batcher = BatchingEmbeddings(inner, max_wait=0.01)
+
+    assert batcher.embed_query("abcd") == [4.0]
+    inner.embed_documents.assert_not_called()
+
+
+@pytest.mark.unit
+def test_aembed_query():
+    batcher = BatchingEmbeddings(FakeEmbeddings(), max_wait=0.01)
+    assert asyncio.run(batcher.aembed_query("abc")) == [3.0]
+
+
+@pytest.mark.unit
+def test_embed_documents_passes_through():
+    inner = FakeEmbeddings()
+    batcher = BatchingEmbeddings(inner)
+    assert batcher.embed_documents(["x", "yy"]) == [[1.0], [2.0]]
+    assert inner.batches == [["x", "yy"]]
+
+
+@pytest.mark.unit
+@patch("src.utils.rag_utils.HuggingFaceEmbeddings")
+def test_create_embeddings_batched(mock_hfemb, monkeypatch):
+    monkeypatch.setattr(rag_utils, "_batched_embeddings", None)
+    monkeypatch.setitem(rag_utils.rag_config, "embedding_batch_size", 16)
+    monkeypatch.setitem(rag_utils.rag_config, "embedding_batch_wait_ms", 10)
+    mock_hfemb.return_value = MagicMock()
+
+    first = rag_utils.create_embeddings(batched=True)
+    second = rag_utils.create_embeddings(batched=True)
+
+    assert isinstance(first, BatchingEmbeddings)
+    assert first is second
+    assert first.max_batch_size == 16
+    assert first.max_wait == pytest.approx(0.01)
+    mock_hfemb.assert_called_once()
@@ -0,0 +1,224 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain.docstore.document import Document
+
+import src.rag.ingest_worker as ingest
+
+
+def passthrough_split(documents, *args, **kwargs):
+    return list(documents)
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = ingest.IngestionService(
+        watch_dir=str(tmp_path), chroma_dir=str(tmp_path / "db"), debounce=0.0
+    )
+    svc._store = MagicMock()
+    svc._store.get.return_value = {"ids": []}
+    return svc
+
+
+@pytest.mark.unit
+def test_load_file_documents_text(tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_text("Big Ben is in London.")
+    docs = ingest.load_file_documents(str(path), {"type": "note"})
+    assert docs[0].page_content == "Big Ben is in London."
+    assert docs[0].metadata == {"source": str(path), "type": "note"}
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_scan_ingests_new_files_once(mock_split, service, tmp_path):
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "b.md").write_text("beta")
+    (tmp_path / "ignored.bin").write_bytes(b"\x00")
+
+    assert service.scan() == 2
+    assert service.stats()["queue_depth"] == 2
+    assert service.run_once() == 2
+
+    service._store.add_documents.assert_called_once()
+    stats = service.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["ingested_files"] == 2
+    assert stats["last_ingest_lag_seconds"] is not None
+
+    assert service.scan() == 0
+    assert service.run_once() == 0
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_modified_file_replaces_old_chunks(mock_split, service, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("v1")
+    service.scan()
+    service.run_once()
+    service._store.delete.assert_not_called()
+    first_ids = service._store.add_documents.call_args.kwargs["ids"]
+
+    path.write_text("version two")
+    service._store.get.return_value = {"ids": first_ids + ["old-extra"]}
+    assert service.scan() == 1
+    service.run_once()
+
+    service._store.get.assert_called_with(where={"source": str(path)})
+    assert service._store.add_documents.call_args.kwargs["ids"] == first_ids
+    service._store.delete.assert_called_once_with(ids=["old-extra"])
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_restart_replaces_previously_ingested_chunks(mock_split, service, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("alpha")
+    service._store.get.return_value = {"ids": ["from-last-run"]}
+
+    service.scan()
+    assert service.run_once() == 1
+
+    service._store.delete.assert_called_once_with(ids=["from-last-run"])
+
+
+@pytest.mark.unit
+def test_debounce_holds_changing_files(tmp_path):
+    svc = ingest.IngestionService(
+        watch_dir=str(tmp_path), chroma_dir=str(tmp_path / "db"), debounce=10
+    )
+    svc._store = MagicMock()
+    (tmp_path / "a.txt").write_text("alpha")
+
+    svc.scan()
+    assert svc.run_once() == 0
+    assert svc.stats()["queue_depth"] == 1
+    svc._store.add_documents.assert_not_called()
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_enqueue_documents(mock_split, service):
+    service.enqueue_documents([Document(page_content="x", metadata={})])
+    assert service.stats()["queue_depth"] == 1
+    assert service.run_once() == 1
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_failed_write_requeues_batch(mock_split, service, tmp_path):
+    (tmp_path / "a.txt").write_text("alpha")
+    service._store.get.return_value = {"ids": ["old-1"]}
+    service._store.add_documents.side_effect = Exception("db locked")
+
+    service.scan()
+    assert service.run_once() == 0
+
+    stats = service.stats()
+    assert stats["queue_depth"] == 1
+    assert stats["last_error"] == "db locked"
+    service._store.delete.assert_not_called()
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_background_thread_ingests_enqueued_file(mock_split, service, tmp_path):
+    path = tmp_path / "late.txt"
+    service.watch_dir = None
+    service.start()
+    try:
+        path.write_text("arrived later")
+        service.enqueue(str(path))
+        deadline = time.monotonic() + 5
+        while service.stats()["ingested_files"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        service.stop()
+
+    assert service.stats()["ingested_files"] == 1
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_bad_document_batch_does_not_block_files(mock_split, service, tmp_path):
+    def add_documents(chunks, ids):
+        if any(chunk.page_content == "bad" for chunk in chunks):
+            raise ValueError("Expected IDs to be unique")
+
+    service._store.add_documents.side_effect = add_documents
+    service.enqueue_documents([Document(page_content="bad", metadata={})])
+    (tmp_path / "a.txt").write_text("alpha")
+    service.scan()
+
+    assert service.run_once() == 1
+    stats = service.stats()
+    assert stats["ingested_files"] == 1
+    assert stats["queue_depth"] == 1
+
+    service.run_once()
+    assert service.run_once() == 0
+    stats = service.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["quarantined"] == 1
+    assert service.quarantined_documents[0][0][0].page_content == "bad"
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_quarantined_file_is_retried_when_it_changes(mock_split, service, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("alpha")
+    service.max_attempts = 1
+    service._store.add_documents.side_effect = Exception("db locked")
+
+    service.scan()
+    service.run_once()
+    assert service.stats()["quarantined"] == 1
+    assert service.scan() == 0
+
+    service._store.add_documents.side_effect = None
+    path.write_text("alpha, fixed")
+    assert service.scan() == 1
+    assert service.run_once() == 1
+    assert service.stats()["quarantined"] == 0
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.split_documents", side_effect=passthrough_split)
+def test_restart_skips_files_ingested_before(mock_split, service, tmp_path):
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "b.txt").write_text("beta")
+    service.scan()
+    service.run_once()
+
+    restarted = ingest.IngestionService(
+        watch_dir=str(tmp_path), chroma_dir=service.chroma_dir, debounce=0.0
+    )
+    assert restarted.scan() == 0
+
+    (tmp_path / "b.txt").write_text("beta, edited")
+    assert restarted.scan() == 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "configured, snapshot_path, expected",
+    [(None, "chroma_snapshots", True), (None, None, False), (False, "snaps", False)],
+)
+def test_publish_snapshot_enabled(monkeypatch, configured, snapshot_path, expected):
+    monkeypatch.setitem(ingest.rag_config, "ingest_publish_snapshot", configured)
+    monkeypatch.setitem(ingest.rag_config, "snapshot_path", snapshot_path)
+    assert ingest.publish_snapshot_enabled() is expected
+
+
+@pytest.mark.unit
+@patch("src.rag.ingest_worker.latest_snapshot", return_value="v1")
+def test_warns_when_snapshot_exists_but_publishing_is_off(
+    mock_latest, monkeypatch, caplog
+):
+    monkeypatch.setitem(ingest.rag_config, "ingest_publish_snapshot", False)
+    with caplog.at_level("WARNING"):
+        assert not ingest.publish_snapshot_enabled()
+    assert "Snapshot publishing is off" in caplog.text
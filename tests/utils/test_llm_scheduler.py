@@ -0,0 +1,253 @@
+import threading
+import time
+
+import pytest
+
+from src.utils.llm_scheduler import (
+    AIMDLimiter,
+    LLMDeadlineExceeded,
+    LLMScheduler,
+    TokenBucket,
+    create_scheduler,
+    is_overload_error,
+    is_retryable_error,
+)
+from src.utils.stub_model import StubChatModel, StubRateLimitError
+
+
+@pytest.mark.unit
+def test_error_classification():
+    assert is_overload_error(StubRateLimitError("429"))
+    assert is_retryable_error(StubRateLimitError("429"))
+    assert is_retryable_error(ConnectionError("reset"))
+    assert not is_retryable_error(ValueError("bad prompt"))
+    assert not is_retryable_error(LLMDeadlineExceeded("late"))
+
+
+@pytest.mark.unit
+def test_aimd_limiter_increases_on_success_and_halves_on_overload():
+    limiter = AIMDLimiter(initial_limit=4, max_limit=8)
+    for _ in range(4):
+        assert limiter.acquire(timeout=0)
+    assert not limiter.try_acquire()
+
+    limiter.release()
+    assert limiter.limit == pytest.approx(4.25)
+
+    limiter.release(overloaded=True, success=False)
+    assert limiter.limit == pytest.approx(2.125)
+    assert limiter.in_flight == 2
+    assert not limiter.try_acquire()
+
+
+@pytest.mark.unit
+def test_aimd_limiter_respects_bounds():
+    limiter = AIMDLimiter(initial_limit=1, min_limit=1, max_limit=2)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 2
+    limiter.acquire()
+    limiter.release(overloaded=True, success=False)
+    assert limiter.limit == 1
+
+
+@pytest.mark.unit
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    start = time.monotonic()
+    assert bucket.acquire(timeout=1)
+    assert time.monotonic() - start >= 0.05
+
+
+@pytest.mark.unit
+def test_token_bucket_disabled_without_rate():
+    bucket = TokenBucket(rate=None)
+    assert all(bucket.try_acquire() for _ in range(100))
+
+
+@pytest.mark.unit
+def test_scheduler_retries_rate_limit_errors():
+    model = StubChatModel(latency=0.01, fail_first=2)
+    scheduler = LLMScheduler(max_attempts=4, base_delay=0.01, deadline=5)
+
+    result = scheduler.call(lambda: model.invoke("hello"))
+
+    assert result.content == "Stub response."
+    assert model.calls == 3
+    assert scheduler.limiter.in_flight == 0
+
+
+@pytest.mark.unit
+def test_scheduler_gives_up_after_max_attempts():
+    model = StubChatModel(latency=0.0, error_rate=1.0)
+    scheduler = LLMScheduler(max_attempts=3, base_delay=0.01, deadline=5)
+
+    with pytest.raises(StubRateLimitError):
+        scheduler.call(lambda: model.invoke("hello"))
+    assert model.calls == 3
+    assert scheduler.limiter.limit < 4
+
+
+@pytest.mark.unit
+def test_scheduler_does_not_retry_permanent_errors():
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise ValueError("bad prompt")
+
+    scheduler = LLMScheduler(base_delay=0.01)
+    with pytest.raises(ValueError):
+        scheduler.call(bad_request)
+    assert len(calls) == 1
+
+
+@pytest.mark.unit
+def test_scheduler_deadline_while_waiting_for_slot():
+    scheduler = LLMScheduler(limiter=AIMDLimiter(initial_limit=1, max_limit=1))
+    scheduler.limiter.acquire()
+    with pytest.raises(LLMDeadlineExceeded):
+        scheduler.call(lambda: "never", deadline=0.05)
+
+
+@pytest.mark.unit
+def test_scheduler_caps_concurrency():
+    model = StubChatModel(latency=0.05)
+    scheduler = LLMScheduler(limiter=AIMDLimiter(initial_limit=2, max_limit=2))
+    peak = []
+
+    def call():
+        peak.append(scheduler.limiter.in_flight)
+        return model.invoke("hello")
+
+    threads = [threading.Thread(target=scheduler.call, args=(call,)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(peak) <= 2
+    assert model.calls == 6
+
+
+@pytest.mark.unit
+def test_scheduler_hedges_slow_calls():
+    model = StubChatModel(latency=0.01, slow_rate=1.0, slow_latency=1.0)
+    fast = StubChatModel(latency=0.01, response="hedged")
+    calls = []
+
+    def call():
+        calls.append(1)
+        return (model if len(calls) == 1 else fast).invoke("hello")
+
+    scheduler = LLMScheduler(hedge_after=0.05, deadline=5)
+    start = time.monotonic()
+    result = scheduler.call(call)
+
+    assert result.content == "hedged"
+    assert time.monotonic() - start < 0.5
+
+
+@pytest.mark.unit
+def test_create_scheduler_defaults_for_missing_config():
+    scheduler = create_scheduler({})
+    assert scheduler.max_attempts == 4
+    assert scheduler.bucket.rate is None
+    assert scheduler.hedge_after is None
+
+
+@pytest.mark.unit
+def test_aimd_limiter_decreases_once_per_window():
+    limiter = AIMDLimiter(initial_limit=32, max_limit=32)
+    epochs = []
+    for _ in range(32):
+        limiter.acquire(timeout=0)
+        epochs.append(limiter.epoch)
+    for epoch in epochs:
+        limiter.release(overloaded=True, success=False, epoch=epoch)
+
+    assert limiter.limit == 16
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.unit
+def test_token_bucket_fractional_rate_allows_one_token():
+    bucket = TokenBucket(rate=0.5)
+    assert bucket.capacity == 1.0
+    assert bucket.acquire(timeout=0)
+
+
+@pytest.mark.unit
+def test_scheduler_burst_of_overloads_halves_limit_once():
+    model = StubChatModel(latency=0.05, error_rate=1.0)
+    scheduler = LLMScheduler(
+        limiter=AIMDLimiter(initial_limit=8, max_limit=8), max_attempts=1
+    )
+
+    def call():
+        with pytest.raises(StubRateLimitError):
+            scheduler.call(lambda: model.invoke("hello"))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert scheduler.limiter.limit == 4
+
+
+@pytest.mark.unit
+def test_hedged_attempts_do_not_start_after_deadline():
+    started = []
+
+    def slow():
+        started.append(time.monotonic())
+        time.sleep(0.3)
+        return "late"
+
+    scheduler = LLMScheduler(
+        limiter=AIMDLimiter(initial_limit=8, max_limit=1),
+        hedge_after=0.05,
+        max_attempts=1,
+    )
+    begin = time.monotonic()
+    errors = []
+
+    def call():
+        try:
+            scheduler.call(slow, deadline=0.2)
+        except LLMDeadlineExceeded as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    time.sleep(0.5)
+
+    assert len(errors) == 4
+    assert all(t - begin < 0.2 for t in started)
+
+
+@pytest.mark.unit
+def test_skipped_hedge_does_not_spend_a_token():
+    scheduler = LLMScheduler(
+        limiter=AIMDLimiter(initial_limit=1, max_limit=1),
+        bucket=TokenBucket(rate=0.01, burst=2),
+        hedge_after=0.02,
+        max_attempts=1,
+    )
+
+    def slow():
+        time.sleep(0.2)
+        return "done"
+
+    assert scheduler.call(slow) == "done"
+    assert scheduler.bucket.tokens == pytest.approx(1.0, abs=0.01)
+    assert scheduler.limiter.in_flight == 0
@@ -0,0 +1,164 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.rag.loadgen as loadgen
+
+
+@pytest.mark.unit
+def test_load_queries_synthetic_by_default():
+    assert loadgen.load_queries() == loadgen.SYNTHETIC_QUERIES
+
+
+@pytest.mark.unit
+def test_load_queries_text_and_jsonl(tmp_path):
+    log = tmp_path / "queries.log"
+    log.write_text(
+        "plain question\n"
+        "\n"
+        + json.dumps({"query": "json question", "ts": 1})
+        + "\n"
+        + json.dumps({"other": "no query"})
+        + "\n"
+    )
+    assert loadgen.load_queries(str(log)) == ["plain question", "json question"]
+
+
+@pytest.mark.unit
+def test_percentile():
+    values = [0.1 * i for i in range(1, 11)]
+    assert loadgen.percentile(values, 50) == pytest.approx(0.5)
+    assert loadgen.percentile(values, 90) == pytest.approx(0.9)
+    assert loadgen.percentile(values, 100) == pytest.approx(1.0)
+    assert loadgen.percentile([], 50) is None
+
+
+@pytest.mark.unit
+def test_summarize_reports_errors_and_latency():
+    stats = loadgen.LoadStats()
+    for latency in (0.1, 0.2, 0.3):
+        stats.record(latency, ok=True)
+    stats.record(1.0, ok=False)
+    stats.record_execution()
+
+    report = loadgen.summarize(
+        stats, 2.0, [{"t": 1, "cpu_percent": 50.0, "rss_mb": 100.0}]
+    )
+
+    assert report["requests"] == 4
+    assert report["pipeline_executions"] == 1
+    assert report["error_rate"] == 0.25
+    assert report["achieved_qps"] == 1.5
+    assert report["latency_ms"]["p50"] == 200.0
+    assert report["max_cpu_percent"] == 50.0
+    assert report["max_rss_mb"] == 100.0
+
+
+@pytest.mark.unit
+def test_run_load_test_closed_loop():
+    def query_fn(query):
+        time.sleep(0.01)
+        return None if query == "bad" else "answer"
+
+    report = loadgen.run_load_test(
+        query_fn, ["good", "bad"], duration=0.3, concurrency=4, sample_interval=0.1
+    )
+
+    assert report["requests"] > 0
+    assert 0 < report["errors"] < report["requests"]
+    assert report["latency_ms"]["p50"] >= 10
+    assert report["resources"]
+
+
+@pytest.mark.unit
+def test_run_load_test_open_loop_rate():
+    calls = []
+    report = loadgen.run_load_test(
+        lambda q: calls.append(q) or "ok", ["q"], duration=0.5, rate=20
+    )
+
+    assert 8 <= report["requests"] <= 11
+    assert report["errors"] == 0
+    assert len(calls) == report["requests"]
+
+
+@pytest.mark.unit
+def test_run_load_test_counts_exceptions_as_errors():
+    def failing(query):
+        raise RuntimeError("boom")
+
+    report = loadgen.run_load_test(failing, ["q"], duration=0.1, concurrency=2)
+    assert report["error_rate"] == 1.0
+
+
+@pytest.mark.unit
+@patch("src.rag.loadgen.query_rag")
+@patch("src.rag.loadgen.setup_rag_chain")
+@patch("src.rag.loadgen.load_serving_vector_store")
+def test_build_query_fn_bypasses_coalescing_by_default(
+    mock_load_store, mock_setup_chain, mock_query_rag
+):
+    mock_load_store.return_value = MagicMock()
+    rag_chain = MagicMock()
+    rag_chain.invoke.return_value = {"result": "answer"}
+    mock_setup_chain.return_value = rag_chain
+    args = loadgen.parse_args(["--stub-latency", "0.2", "--stub-error-rate", "0.1"])
+    stats = loadgen.LoadStats()
+
+    query_fn = loadgen.build_query_fn(args, stats)
+
+    assert query_fn("q") == {"result": "answer"}
+    rag_chain.invoke.assert_called_once_with({"query": "q"})
+    mock_query_rag.assert_not_called()
+    assert stats.executions == 1
+    llm = mock_setup_chain.call_args.kwargs["llm"]
+    assert isinstance(llm, loadgen.StubChatModel)
+    assert llm.latency == 0.2
+    assert llm.error_rate == 0.1
+    assert mock_setup_chain.call_args.kwargs["filters"] == {"type": "resume"}
+
+
+@pytest.mark.unit
+@patch("src.rag.loadgen.ScheduledChatModel")
+@patch("src.rag.loadgen.query_rag", return_value="answer")
+@patch("src.rag.loadgen.setup_rag_chain")
+@patch("src.rag.loadgen.load_serving_vector_store")
+def test_build_query_fn_coalesce_uses_serving_path(
+    mock_load_store, mock_setup_chain, mock_query_rag, mock_scheduled
+):
+    mock_load_store.return_value = MagicMock()
+    mock_setup_chain.return_value = MagicMock()
+    args = loadgen.parse_args(["--coalesce"])
+
+    query_fn = loadgen.build_query_fn(args, loadgen.LoadStats())
+
+    assert query_fn("q") == "answer"
+    assert mock_query_rag.call_args.args[1] == "q"
+    assert mock_setup_chain.call_args.kwargs["llm"] is mock_scheduled.return_value
+
+
+@pytest.mark.unit
+def test_pipeline_executions_reported_separately():
+    calls = []
+    stats = loadgen.LoadStats()
+    chain = MagicMock(invoke=calls.append)
+    counted = loadgen._CountingInvoker(chain, stats)
+
+    def query_fn(query):
+        # Every other request is answered without running the pipeline.
+        return counted.invoke(query) or "answer" if query == "miss" else "shared"
+
+    report = loadgen.run_load_test(
+        query_fn, ["miss", "hit"], duration=0.2, concurrency=2, stats=stats
+    )
+
+    assert 0 < report["pipeline_executions"] < report["requests"]
+    assert report["pipeline_executions"] == len(calls)
+
+
+@pytest.mark.unit
+@patch("src.rag.loadgen.load_serving_vector_store", return_value=None)
+def test_main_fails_without_vector_store(mock_load_store):
+    assert loadgen.main(["--duration", "0.1"]) is None
@@ -0,0 +1,42 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.utils.llm_scheduler import LLMDeadlineExceeded
+from src.utils.model import get_model_response
+from src.utils.stub_model import StubRateLimitError
+
+CONFIG = {"model": {"model_name": "gemini"}, "generation": {}}
+
+
+def scheduler_raising(error):
+    scheduler = MagicMock()
+    scheduler.call.side_effect = error
+    return scheduler
+
+
+@pytest.mark.unit
+@patch("src.utils.model.get_llm_config", return_value=CONFIG)
+@pytest.mark.parametrize(
+    "error", [LLMDeadlineExceeded("late"), StubRateLimitError("quota")]
+)
+def test_get_model_response_raises_deadline_and_quota_errors(mock_config, error):
+    with patch("src.utils.model.get_scheduler", return_value=scheduler_raising(error)):
+        with pytest.raises(type(error)):
+            get_model_response("hello")
+
+
+@pytest.mark.unit
+@patch("src.utils.model.get_llm_config", return_value=CONFIG)
+def test_get_model_response_names_other_errors(mock_config):
+    with patch(
+        "src.utils.model.get_scheduler",
+        return_value=scheduler_raising(ValueError("bad prompt")),
+    ):
+        response = get_model_response("hello")
+
+    assert "ValueError" in response["content"]
+    assert response["response_metadata"] == {
+        "error": "ValueError",
+        "error_message": "bad prompt",
+    }
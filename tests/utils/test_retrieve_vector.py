@@ -1,3 +1,5 @@
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -123,3 +125,31 @@ def test_main_fails_to_setup_rag_chain(
     retrieve_vector.main()
 
     mock_logger.error.assert_called_with("Failed to setup RAG chain")
+
+
+@pytest.mark.unit
+def test_query_rag_coalesces_identical_queries():
+    mock_chain = MagicMock()
+
+    def slow_invoke(_):
+        time.sleep(0.2)
+        return {"result": "answer"}
+
+    mock_chain.invoke.side_effect = slow_invoke
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                retrieve_vector.query_rag(mock_chain, "same query")
+            )
+        )
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["answer"] * 4
+    mock_chain.invoke.assert_called_once()
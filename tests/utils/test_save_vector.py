@@ -98,6 +98,63 @@ def test_add_documents_to_vector_store_success(mock_split, mock_load):
     fake_store.add_documents.assert_called_once()
 
 
+@pytest.mark.unit
+@patch("src.rag.save_vector.ShardedVectorStore")
+@patch("src.rag.save_vector.create_embeddings", return_value="fake-embedding")
+def test_save_sharded_vector_store_uses_existing(mock_emb, mock_store_cls):
+    mock_store = mock_store_cls.return_value
+    mock_store.has_data.return_value = True
+
+    store = svs.save_sharded_vector_store(
+        documents=[Document(page_content="Test", metadata={})]
+    )
+
+    assert store == mock_store
+    mock_store.add_documents.assert_not_called()
+
+
+@pytest.mark.unit
+@patch(
+    "src.rag.save_vector.split_documents",
+    return_value=[Document(page_content="chunk", metadata={})],
+)
+@patch("src.rag.save_vector.ShardedVectorStore")
+@patch("src.rag.save_vector.create_embeddings", return_value="fake-embedding")
+def test_save_sharded_vector_store_force_recreate(mock_emb, mock_store_cls, mock_split):
+    mock_store = mock_store_cls.return_value
+
+    store = svs.save_sharded_vector_store(
+        documents=[Document(page_content="Test", metadata={})], force_recreate=True
+    )
+
+    assert store == mock_store
+    mock_store.has_data.assert_not_called()
+    mock_store.add_documents.assert_called_once()
+
+
+@pytest.mark.unit
+@patch("src.rag.save_vector.get_shard_router")
+@patch("src.rag.save_vector.load_sharded_vector_store")
+@patch(
+    "src.rag.save_vector.split_documents",
+    return_value=[Document(page_content="chunk", metadata={})],
+)
+def test_add_documents_to_vector_store_routes_to_shards(
+    mock_split, mock_load_sharded, mock_router
+):
+    mock_router.return_value.enabled = True
+    fake_store = MagicMock()
+    mock_load_sharded.return_value = fake_store
+
+    result = svs.add_documents_to_vector_store(
+        [Document(page_content="Test", metadata={})], chroma_dir="shards"
+    )
+
+    assert result == fake_store
+    mock_load_sharded.assert_called_once_with("shards")
+    fake_store.add_documents.assert_called_once()
+
+
 def create_test_pdf(pdf_path: Path, text_pages):
     """Create a simple PDF with given list of page texts."""
     c = canvas.Canvas(str(pdf_path))
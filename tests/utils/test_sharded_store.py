@@ -0,0 +1,182 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain.docstore.document import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_huggingface import HuggingFaceEmbeddings
+
+import src.rag.sharded_store as sharded
+
+
+@pytest.mark.unit
+def test_router_routes_by_metadata_key():
+    router = sharded.ShardRouter(shard_key="type", num_shards=4)
+    doc = Document(page_content="text", metadata={"type": "resume"})
+    assert router.shard_for(doc) == "type=resume"
+
+
+@pytest.mark.unit
+def test_router_hashes_without_metadata_key():
+    router = sharded.ShardRouter(num_shards=4)
+    doc = Document(page_content="text", metadata={})
+    shard = router.shard_for(doc)
+    assert shard.startswith("hash-")
+    assert 0 <= int(shard.split("-")[1]) < 4
+    assert router.shard_for(Document(page_content="text")) == shard
+
+
+@pytest.mark.unit
+def test_router_keeps_a_source_in_one_shard():
+    router = sharded.ShardRouter(num_shards=4)
+    shards = {
+        router.shard_for(Document(page_content=f"chunk {i}", metadata={"source": "a"}))
+        for i in range(20)
+    }
+    assert len(shards) == 1
+
+
+@pytest.mark.unit
+def test_router_enabled():
+    assert not sharded.ShardRouter().enabled
+    assert sharded.ShardRouter(num_shards=2).enabled
+    assert sharded.ShardRouter(shard_key="type").enabled
+
+
+@pytest.mark.unit
+def test_shards_for_filter_prunes_by_shard_key():
+    router = sharded.ShardRouter(shard_key="type")
+    names = ["type=resume", "type=report", "hash-0"]
+    assert router.shards_for_filter({"type": "resume"}, names) == ["type=resume"]
+    assert router.shards_for_filter({"type": "missing"}, names) == []
+    assert router.shards_for_filter(None, names) == names
+    assert router.shards_for_filter({"page": 1}, names) == names
+
+
+@pytest.mark.unit
+@patch("src.rag.sharded_store.Chroma")
+def test_add_documents_routes_to_shards(mock_chroma, tmp_path):
+    shards = {}
+
+    def make_shard(persist_directory, embedding_function):
+        shard = MagicMock()
+        shard.add_documents.side_effect = lambda docs, ids: ids
+        shards[persist_directory] = shard
+        return shard
+
+    mock_chroma.side_effect = make_shard
+    router = sharded.ShardRouter(shard_key="type")
+    store = sharded.ShardedVectorStore(str(tmp_path), MagicMock(), router)
+
+    ids = store.add_documents(
+        [
+            Document(page_content="a", metadata={"type": "resume"}),
+            Document(page_content="b", metadata={"type": "report"}),
+            Document(page_content="c", metadata={"type": "resume"}),
+        ]
+    )
+
+    assert len(set(ids)) == 3
+    assert sorted(store.shard_names()) == ["type=report", "type=resume"]
+    resume_shard = shards[str(tmp_path / "shard_type=resume")]
+    assert len(resume_shard.add_documents.call_args[0][0]) == 2
+
+
+@pytest.mark.unit
+@patch("src.rag.sharded_store.Chroma")
+def test_similarity_search_merges_top_k(mock_chroma, tmp_path):
+    (tmp_path / "shard_hash-0").mkdir()
+    (tmp_path / "shard_hash-1").mkdir()
+    shard_a, shard_b = MagicMock(), MagicMock()
+    shard_a.similarity_search_by_vector_with_relevance_scores.return_value = [
+        (Document(page_content="a1"), 0.1),
+        (Document(page_content="a2"), 0.5),
+    ]
+    shard_b.similarity_search_by_vector_with_relevance_scores.return_value = [
+        (Document(page_content="b1"), 0.3),
+    ]
+    mock_chroma.side_effect = [shard_a, shard_b]
+    embedding = MagicMock()
+    embedding.embed_query.return_value = [0.0, 1.0]
+
+    store = sharded.ShardedVectorStore(
+        str(tmp_path), embedding, sharded.ShardRouter(num_shards=2)
+    )
+    docs = store.similarity_search("query", k=2)
+
+    assert [d.page_content for d in docs] == ["a1", "b1"]
+    embedding.embed_query.assert_called_once_with("query")
+
+
+@pytest.mark.unit
+def test_chunk_ids_are_deterministic_per_source_position():
+    docs = [
+        Document(page_content="x", metadata={"source": "a.pdf", "page": 1}),
+        Document(page_content="y", metadata={"source": "a.pdf", "page": 1}),
+        Document(page_content="x", metadata={"source": "b.pdf", "page": 1}),
+    ]
+    ids = sharded.chunk_ids(docs)
+    assert len(set(ids)) == 3
+    assert sharded.chunk_ids(docs) == ids
+
+    no_source = [Document(page_content="same"), Document(page_content="same")]
+    no_source_ids = sharded.chunk_ids(no_source)
+    assert len(set(no_source_ids)) == 2
+    assert sharded.chunk_ids(no_source[:1]) == no_source_ids[:1]
+
+
+@pytest.mark.unit
+@patch("src.rag.sharded_store.os.path.exists", return_value=False)
+def test_load_sharded_vector_store_missing_dir(mock_exists, caplog):
+    with caplog.at_level("ERROR"):
+        result = sharded.load_sharded_vector_store("missing_dir")
+    assert result is None
+    assert "Sharded vector store not found at: missing_dir" in caplog.text
+
+
+@pytest.mark.integration
+def test_sharded_store_real_search(tmp_path):
+    embeddings = HuggingFaceEmbeddings(
+        model_name="sentence-transformers/all-MiniLM-L6-v2"
+    )
+    store = sharded.ShardedVectorStore(
+        str(tmp_path), embeddings, sharded.ShardRouter(num_shards=3)
+    )
+    store.add_documents(
+        [
+            Document(page_content="The Eiffel Tower is in Paris."),
+            Document(page_content="Big Ben is in London."),
+            Document(page_content="The Colosseum is in Rome."),
+        ]
+    )
+
+    reopened = sharded.ShardedVectorStore(
+        str(tmp_path), embeddings, sharded.ShardRouter(num_shards=3)
+    )
+    results = reopened.as_retriever(search_kwargs={"k": 1}).invoke("Where is Big Ben?")
+    assert "Big Ben" in results[0].page_content
+
+
+@pytest.mark.integration
+def test_reingesting_changed_file_overwrites_its_chunks(tmp_path):
+    store = sharded.ShardedVectorStore(
+        str(tmp_path), DeterministicFakeEmbedding(size=16), sharded.ShardRouter(4)
+    )
+
+    def chunks(version):
+        return [
+            Document(
+                page_content=f"version {version} part {i}", metadata={"source": "a"}
+            )
+            for i in range(6)
+        ]
+
+    store.add_documents(chunks("one"))
+    store.add_documents(chunks("two"))
+
+    contents = [
+        text
+        for name in store.shard_names()
+        for text in store._shard(name).get()["documents"]
+    ]
+    assert len(contents) == 6
+    assert not any("version one" in text for text in contents)
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+
+def run_concurrently(n, target):
+    results = [None] * n
+    errors = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+@pytest.mark.unit
+def test_do_coalesces_concurrent_duplicates():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    results, errors = run_concurrently(5, lambda: flight.do("q", slow))
+
+    assert len(calls) == 1
+    assert results == ["answer"] * 5
+    assert errors == [None] * 5
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.unit
+def test_do_runs_distinct_keys_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+
+
+@pytest.mark.unit
+def test_do_propagates_error_to_all_callers():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise ValueError("boom")
+
+    results, errors = run_concurrently(3, lambda: flight.do("q", failing))
+
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.do("q", lambda: "recovered") == "recovered"
+
+
+@pytest.mark.unit
+def test_do_waiter_times_out():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.5)
+        return "late"
+
+    leader = threading.Thread(target=flight.do, args=("q", slow))
+    leader.start()
+    started.wait()
+
+    with pytest.raises(TimeoutError):
+        flight.do("q", slow, timeout=0.05)
+    leader.join()
+
+
+@pytest.mark.unit
+def test_ado_shares_result_with_sync_caller():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "shared"
+
+    leader = threading.Thread(target=flight.do, args=("q", slow))
+    leader.start()
+    started.wait()
+
+    result = asyncio.run(flight.ado("q", slow))
+    leader.join()
+
+    assert result == "shared"
+    assert len(calls) == 1
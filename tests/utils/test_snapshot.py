@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain.docstore.document import Document
+
+import src.rag.snapshot as snapshot
+
+
+def make_store(path):
+    path.mkdir()
+    conn = sqlite3.connect(path / "chroma.sqlite3")
+    conn.execute("CREATE TABLE embeddings (id TEXT)")
+    conn.execute("INSERT INTO embeddings VALUES ('a')")
+    conn.commit()
+    conn.close()
+    (path / "segment").mkdir()
+    (path / "segment" / "data_level0.bin").write_bytes(b"index")
+    return path
+
+
+@pytest.mark.unit
+def test_build_snapshot_publishes_version(tmp_path):
+    source = make_store(tmp_path / "db")
+    root = tmp_path / "snapshots"
+
+    version = snapshot.build_snapshot(str(source), str(root))
+
+    assert version
+    assert snapshot.latest_snapshot(str(root)) == version
+    assert snapshot.list_snapshots(str(root)) == [version]
+    manifest = json.loads((root / version / "manifest.json").read_text())
+    assert manifest["sharded"] is False
+    assert sorted(manifest["files"]) == ["chroma.sqlite3", "segment/data_level0.bin"]
+    conn = sqlite3.connect(root / version / "chroma.sqlite3")
+    assert conn.execute("SELECT id FROM embeddings").fetchall() == [("a",)]
+    conn.close()
+
+
+@pytest.mark.unit
+def test_build_snapshot_prunes_old_versions(tmp_path):
+    source = make_store(tmp_path / "db")
+    root = tmp_path / "snapshots"
+
+    versions = [
+        snapshot.build_snapshot(str(source), str(root), keep=2) for _ in range(3)
+    ]
+
+    assert snapshot.list_snapshots(str(root)) == versions[1:]
+    assert snapshot.latest_snapshot(str(root)) == versions[-1]
+
+
+@pytest.mark.unit
+def test_build_snapshot_missing_source(tmp_path, caplog):
+    with caplog.at_level("ERROR"):
+        version = snapshot.build_snapshot(str(tmp_path / "missing"), str(tmp_path))
+    assert version is None
+    assert "Vector store not found" in caplog.text
+
+
+@pytest.mark.unit
+@patch("src.rag.snapshot._release_store")
+@patch("src.rag.snapshot.load_snapshot")
+def test_loader_swaps_to_new_snapshot(mock_load, mock_release, tmp_path):
+    old_store, new_store = MagicMock(), MagicMock()
+    mock_load.side_effect = [old_store, new_store]
+    loader = snapshot.SnapshotLoader(str(tmp_path), workdir=str(tmp_path))
+    (tmp_path / "v1").mkdir()
+    (tmp_path / "v2").mkdir()
+
+    assert not loader.refresh()
+
+    (tmp_path / "LATEST").write_text("v1")
+    assert loader.refresh()
+    assert loader.get() is old_store
+
+    assert loader.refresh()
+    assert mock_load.call_count == 1
+
+    (tmp_path / "LATEST").write_text("v2")
+    assert loader.refresh()
+    assert loader.get() is new_store
+    assert loader.version == "v2"
+    mock_release.assert_not_called()
+
+
+@pytest.mark.unit
+@patch("src.rag.snapshot._release_store")
+@patch("src.rag.snapshot.load_snapshot")
+def test_loader_opens_private_copy_and_releases_retired_versions(
+    mock_load, mock_release, tmp_path
+):
+    published = tmp_path / "snapshots"
+    workdir = tmp_path / "work"
+    published.mkdir()
+    workdir.mkdir()
+    stores = [MagicMock(), MagicMock(), MagicMock()]
+    mock_load.side_effect = stores
+    loader = snapshot.SnapshotLoader(str(published), workdir=str(workdir))
+
+    private_roots = []
+    for version in ("v1", "v2", "v3"):
+        make_store(published / version)
+        (published / "LATEST").write_text(version)
+        assert loader.refresh()
+        private_root = mock_load.call_args.args[0]
+        assert private_root.startswith(str(workdir))
+        assert os.path.exists(os.path.join(private_root, version, "chroma.sqlite3"))
+        private_roots.append(private_root)
+
+    # v2 stays open for in-flight queries; v1 is released.
+    mock_release.assert_called_once_with(stores[0], private_roots[0])
+
+
+@pytest.mark.unit
+@patch("src.rag.snapshot.load_snapshot", return_value=None)
+def test_loader_keeps_current_store_when_load_fails(mock_load, tmp_path):
+    loader = snapshot.SnapshotLoader(str(tmp_path), workdir=str(tmp_path))
+    current = MagicMock()
+    loader._store, loader.version = current, "v1"
+
+    (tmp_path / "v2").mkdir()
+    (tmp_path / "LATEST").write_text("v2")
+    assert loader.refresh()
+    assert loader.get() is current
+    assert loader.version == "v1"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["LATEST", "v2"]
+
+
+@pytest.mark.unit
+def test_snapshot_retriever_uses_current_store():
+    store = MagicMock()
+    store.as_retriever.return_value.invoke.return_value = [Document(page_content="hit")]
+    loader = snapshot.SnapshotLoader("unused")
+    loader._store = store
+
+    docs = loader.as_retriever(search_kwargs={"k": 2}).invoke("query")
+
+    assert docs[0].page_content == "hit"
+    store.as_retriever.assert_called_once_with(search_kwargs={"k": 2})
+
+
+@pytest.mark.unit
+def test_build_snapshot_keeps_previous_latest(tmp_path):
+    source = make_store(tmp_path / "db")
+    root = tmp_path / "snapshots"
+
+    first = snapshot.build_snapshot(str(source), str(root), keep=1)
+    second = snapshot.build_snapshot(str(source), str(root), keep=1)
+
+    assert snapshot.list_snapshots(str(root)) == [first, second]
+    assert snapshot.latest_snapshot(str(root)) == second
+
+
+@pytest.mark.unit
+def test_build_snapshot_waits_for_write_lock(tmp_path):
+    source = make_store(tmp_path / "db")
+    root = tmp_path / "snapshots"
+    results = []
+
+    with snapshot.vector_store_write_lock(str(source)):
+        thread = threading.Thread(
+            target=lambda: results.append(
+                snapshot.build_snapshot(str(source), str(root))
+            )
+        )
+        thread.start()
+        time.sleep(0.2)
+        assert results == []
+    thread.join()
+
+    assert results[0]
+    manifest = json.loads((root / results[0] / "manifest.json").read_text())
+    assert ".write.lock" not in manifest["files"]
+
+
+@pytest.mark.unit
+def test_release_store_stops_client_and_removes_copy(tmp_path):
+    private_root = tmp_path / "private"
+    private_root.mkdir()
+    store = MagicMock()
+    store._client._identifier = "snapshot-client"
+    system = MagicMock()
+    snapshot.SharedSystemClient._identifier_to_system["snapshot-client"] = system
+
+    snapshot._release_store(store, str(private_root))
+
+    system.stop.assert_called_once()
+    assert "snapshot-client" not in snapshot.SharedSystemClient._identifier_to_system
+    assert not private_root.exists()